@@ -2,20 +2,93 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import time
+from collections import Counter
+from collections.abc import Awaitable
 from datetime import timedelta
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, TypeVar
 
+import aiohttp
 import discord
+from discord.ext import tasks
 from redbot.core import Config, app_commands, commands
+from redbot.core.data_manager import cog_data_path
 
-from .types import BanTrapGuildSettings
-from .views import MessageView
+from .cache import TTLSet
+from .fingerprints import FingerprintIndex, fingerprint_message
+from .jobs import JobQueue
+from .logs import LogEvent, LogPipeline
+from .store import EventStore
+from .types import (
+    BanTrapAction,
+    BanTrapEventKind,
+    BanTrapGuildSettings,
+    BanTrapMemberSettings,
+    SoftBanJob,
+)
+from .views import DigestView, MessageView
 
 if TYPE_CHECKING:
     from redbot.core.bot import Red
 
 log = logging.getLogger("red.easysystem.bantrap")
 
+T = TypeVar("T")
+
+# Discord accepts at most 200 users per bulk ban request.
+RAID_BAN_LIMIT = 200
+DEFAULT_ACTION_LIMIT = 3
+HISTORY_PAGE_SIZE = 15
+EVENT_LABELS: dict[BanTrapEventKind, str] = {
+    "triggered": "Triggered",
+    "joined": "Flagged account joined",
+    "spam_copy": "Posted trapped spam",
+    "skipped": "Skipped",
+    "soft_banned": "Soft-banned",
+    "banned": "Banned",
+    "kicked": "Kicked",
+    "timed_out": "Timed out",
+    "ban_failed": "Action failed",
+    "unban_failed": "Unban failed",
+}
+# Further trap hits from a member are ignored while their action is pending, and
+# for this long after the first hit to cover the time until the job is stored.
+RECENT_ACTION_TTL = 30
+# Missed messages are read in batches of this size, one channel at a time.
+CATCH_UP_LIMIT = 500
+# How often new checkpoints are written to Config, instead of on every message.
+CHECKPOINT_FLUSH_INTERVAL = 30
+# How long the content of a trapped message is matched against other channels.
+FINGERPRINT_TTL = 600
+ACTION_NAMES: dict[BanTrapAction, str] = {
+    "softban": "soft-ban",
+    "timeout": "timeout",
+    "kick": "kick",
+    "ban": "ban",
+}
+ACTION_DESCRIPTIONS: dict[BanTrapAction, str] = {
+    "softban": "a soft-ban with seven days of messages purged",
+    "timeout": "a 3-day timeout",
+    "kick": "a kick with their message deleted",
+    "ban": "a ban with seven days of messages purged",
+}
+# Permissions the bot needs for each action, as ``discord.Permissions`` flag names.
+ACTION_PERMISSIONS: dict[BanTrapAction, tuple[str, ...]] = {
+    "softban": ("ban_members",),
+    "timeout": ("moderate_members",),
+    # Kicks do not purge messages, so the trapped message is deleted separately.
+    "kick": ("kick_members", "manage_messages"),
+    "ban": ("ban_members",),
+}
+ACTION_OUTCOMES: dict[BanTrapAction, BanTrapEventKind] = {
+    "softban": "soft_banned",
+    "timeout": "timed_out",
+    "kick": "kicked",
+    "ban": "banned",
+}
+# Errors worth retrying, as opposed to permission or validation errors.
+TRANSIENT_ERRORS = (discord.DiscordServerError, aiohttp.ClientError, TimeoutError)
+
 
 class BanTrap(commands.Cog):
     """Soft-ban members who ignore the warning in a designated channel."""
@@ -25,9 +98,86 @@ class BanTrap(commands.Cog):
         self.settings = Config.get_conf(
             self, identifier=184_927_361, force_registration=True
         )
-        defaults: BanTrapGuildSettings = {"channel_id": None, "log_channel_id": None}
+        defaults: BanTrapGuildSettings = {
+            "channel_id": None,
+            "log_channel_id": None,
+            "raid_mode": False,
+            "raid_window": 5,
+            "log_window": 5,
+            "forward_messages": False,
+            "max_concurrent_actions": DEFAULT_ACTION_LIMIT,
+            "join_guard": False,
+            "spam_sweep": False,
+            "last_message_id": None,
+            "warning_message_id": None,
+            "action": "softban",
+        }
         self.settings.register_guild(**defaults)
-        self._members_in_progress: set[tuple[int, int]] = set()
+        empty_member: BanTrapMemberSettings = {"soft_ban_job": None}
+        self.settings.register_member(**empty_member)
+        # Collapses bursts from one member into a single moderation action. The
+        # entry is dropped once the action is done, so a returning offender is
+        # handled again.
+        self._recent_actions = TTLSet[tuple[int, int]](RECENT_ACTION_TTL)
+        self._jobs = JobQueue(
+            self.settings, self._run_jobs, on_finish=self._recent_actions.discard
+        )
+        # Raid mode delays trap hits per guild until this deadline and bans them together.
+        self._raid_deadlines: dict[int, float] = {}
+        self._action_limits: dict[int, int] = {}
+        self._action_slots: dict[int, asyncio.Semaphore] = {}
+        self._join_guard_guild_ids: set[int] = set()
+        self._actions: dict[int, BanTrapAction] = {}
+        self._spam_sweep_guild_ids: set[int] = set()
+        self._fingerprints = FingerprintIndex(FINGERPRINT_TTL)
+        # The newest message seen in each trap channel, to catch up after downtime.
+        self._checkpoints: dict[int, int] = {}
+        # Checkpoints by guild that have not been written to Config yet.
+        self._unsaved_checkpoints: dict[int, int] = {}
+        self._catch_up_task: asyncio.Task[None] | None = None
+        self._events = EventStore(cog_data_path(self) / "events.sqlite3")
+        # Warm copies of the configured channel IDs, so the message listener can
+        # reject messages from ordinary channels without awaiting Config.
+        self._trap_channel_ids: set[int] = set()
+        self._log_channel_ids: dict[int, int] = {}
+        self._forward_guild_ids: set[int] = set()
+        self._logs = LogPipeline(self._send_log_digest)
+
+    async def cog_load(self) -> None:
+        all_guilds: dict[int, BanTrapGuildSettings] = await self.settings.all_guilds()
+        for guild_id, guild_settings in all_guilds.items():
+            if guild_settings["channel_id"] is not None:
+                self._trap_channel_ids.add(guild_settings["channel_id"])
+                if guild_settings["last_message_id"] is not None:
+                    self._checkpoints[guild_settings["channel_id"]] = guild_settings[
+                        "last_message_id"
+                    ]
+            if guild_settings["log_channel_id"] is not None:
+                self._log_channel_ids[guild_id] = guild_settings["log_channel_id"]
+            if guild_settings["forward_messages"]:
+                self._forward_guild_ids.add(guild_id)
+            self._logs.windows[guild_id] = guild_settings["log_window"]
+            self._action_limits[guild_id] = guild_settings["max_concurrent_actions"]
+            if guild_settings["join_guard"]:
+                self._join_guard_guild_ids.add(guild_id)
+            self._actions[guild_id] = guild_settings["action"]
+            if guild_settings["spam_sweep"]:
+                self._spam_sweep_guild_ids.add(guild_id)
+
+        await self._events.open()
+        await self._jobs.load()
+        self._jobs.start(self.bot.wait_until_red_ready)
+        self._checkpoint_loop.start()
+        self._start_catch_up()
+
+    async def cog_unload(self) -> None:
+        if self._catch_up_task is not None:
+            self._catch_up_task.cancel()
+        self._checkpoint_loop.cancel()
+        await self._save_checkpoints()
+        await self._jobs.close()
+        await self._logs.close()
+        await self._events.close()
 
     @commands.hybrid_group(  # pyright: ignore[reportArgumentType]
         name="bantrap", description="Manage the ban-trap feature."
@@ -62,17 +212,11 @@ class BanTrap(commands.Cog):
             )
             return
 
-        bot_member = ctx.guild.me
-        permissions = bot_member.guild_permissions
-        missing = [
-            label
-            for allowed, label in (
-                (permissions.manage_channels, "Manage Channels"),
-                (permissions.ban_members, "Ban Members"),
-                (permissions.moderate_members, "Moderate Members"),
-            )
-            if not allowed
-        ]
+        missing = self._missing_permissions(
+            ctx.guild, self._actions.get(ctx.guild.id, "softban")
+        )
+        if not ctx.guild.me.guild_permissions.manage_channels:
+            missing.insert(0, "Manage Channels")
         if missing:
             await ctx.send(
                 view=MessageView(
@@ -97,13 +241,12 @@ class BanTrap(commands.Cog):
             return
 
         reason = f"Ban trap configured by {ctx.author} ({ctx.author.id})"
+        action = self._actions.get(ctx.guild.id, "softban")
         try:
             channel = await ctx.guild.create_text_channel(
-                safe_name,
-                topic="Do not send messages here. Doing so triggers an automatic soft-ban.",
-                reason=reason,
+                safe_name, topic=self._warning_topic(action), reason=reason
             )
-            await channel.send(view=self._warning_view())
+            warning = await channel.send(view=self._warning_view(action))
         except discord.HTTPException:
             log.exception(
                 "Could not create the ban-trap channel in guild %s", ctx.guild.id
@@ -119,6 +262,14 @@ class BanTrap(commands.Cog):
             return
 
         await self.settings.guild(ctx.guild).channel_id.set(channel.id)
+        await self.settings.guild(ctx.guild).last_message_id.set(warning.id)
+        await self.settings.guild(ctx.guild).warning_message_id.set(warning.id)
+        self._unsaved_checkpoints.pop(ctx.guild.id, None)
+        if existing_id is not None:
+            self._trap_channel_ids.discard(existing_id)
+            self._checkpoints.pop(existing_id, None)
+        self._trap_channel_ids.add(channel.id)
+        self._checkpoints[channel.id] = warning.id
         await ctx.send(
             view=MessageView(
                 "Ban-trap created",
@@ -141,6 +292,10 @@ class BanTrap(commands.Cog):
         await self.settings.guild(ctx.guild).log_channel_id.set(
             channel.id if channel is not None else None
         )
+        if channel is None:
+            self._log_channel_ids.pop(ctx.guild.id, None)
+        else:
+            self._log_channel_ids[ctx.guild.id] = channel.id
 
         if channel is None:
             text = "Ban-trap event logging has been disabled."
@@ -153,26 +308,311 @@ class BanTrap(commands.Cog):
             ephemeral=True,
         )
 
+    @bantrap.command(  # pyright: ignore[reportArgumentType]
+        name="log-settings",
+        description="Configure how ban-trap moderation logs are batched.",
+    )
+    @app_commands.describe(
+        window="How many seconds to collect events before sending one log digest.",
+        forward_messages="Whether trapped messages should be forwarded to the log channel.",
+    )
+    @app_commands.rename(forward_messages="forward-messages")
+    async def bantrap_log_settings(
+        self,
+        ctx: commands.Context,
+        window: commands.Range[int, 1, 60] = 5,
+        forward_messages: bool = False,
+    ) -> None:
+        """Set the log digest window and whether trapped messages are forwarded."""
+        assert ctx.guild is not None
+        guild_settings = self.settings.guild(ctx.guild)
+        await guild_settings.log_window.set(window)
+        await guild_settings.forward_messages.set(forward_messages)
+        self._logs.windows[ctx.guild.id] = window
+        if forward_messages:
+            self._forward_guild_ids.add(ctx.guild.id)
+        else:
+            self._forward_guild_ids.discard(ctx.guild.id)
+
+        text = f"Ban-trap events will be collected into one log digest every {window} seconds."
+        if forward_messages:
+            text += " Trapped messages will be forwarded to the log channel."
+        await ctx.send(
+            view=MessageView(
+                "Log settings updated", text, colour=discord.Colour.green()
+            ),
+            ephemeral=True,
+        )
+
+    @bantrap.command(  # pyright: ignore[reportArgumentType]
+        name="raid-mode",
+        description="Collect ban-trap hits and ban them together during a raid.",
+    )
+    @app_commands.describe(
+        enabled="Whether raid mode should be enabled.",
+        window="How many seconds to collect hits before banning them together.",
+    )
+    async def bantrap_raid_mode(
+        self,
+        ctx: commands.Context,
+        enabled: bool,
+        window: commands.Range[int, 1, 60] = 5,
+    ) -> None:
+        """Enable or disable batched bans for raid waves."""
+        assert ctx.guild is not None
+        if enabled and not ctx.guild.me.guild_permissions.manage_guild:
+            await ctx.send(
+                view=MessageView(
+                    "Missing permissions",
+                    "Raid mode bans in bulk, which requires the Manage Server permission.",
+                    colour=discord.Colour.red(),
+                ),
+                ephemeral=True,
+            )
+            return
+
+        guild_settings = self.settings.guild(ctx.guild)
+        await guild_settings.raid_mode.set(enabled)
+        await guild_settings.raid_window.set(window)
+
+        if enabled:
+            text = f"Ban-trap hits will be collected for {window} seconds and banned together."
+        else:
+            text = "Ban-trap hits will be banned one at a time."
+        await ctx.send(
+            view=MessageView("Raid mode updated", text, colour=discord.Colour.green()),
+            ephemeral=True,
+        )
+
+    @bantrap.command(  # pyright: ignore[reportArgumentType]
+        name="max-actions",
+        description="Set how many ban-trap moderation actions may run at once.",
+    )
+    @app_commands.describe(limit="The number of moderation requests sent in parallel.")
+    async def bantrap_max_actions(
+        self, ctx: commands.Context, limit: commands.Range[int, 1, 10]
+    ) -> None:
+        """Set the per-server concurrency cap for ban-trap moderation requests."""
+        assert ctx.guild is not None
+        await self.settings.guild(ctx.guild).max_concurrent_actions.set(limit)
+        self._action_limits[ctx.guild.id] = limit
+        # Actions that are already running keep the previous limit.
+        self._action_slots.pop(ctx.guild.id, None)
+
+        await ctx.send(
+            view=MessageView(
+                "Concurrency updated",
+                f"Up to {limit} ban-trap moderation actions will run at once.",
+                colour=discord.Colour.green(),
+            ),
+            ephemeral=True,
+        )
+
+    @bantrap.command(  # pyright: ignore[reportArgumentType]
+        name="join-guard",
+        description="Act on accounts that triggered a ban-trap in any server when they join.",
+    )
+    @app_commands.describe(
+        enabled="Whether flagged accounts should be moderated on join."
+    )
+    async def bantrap_join_guard(self, ctx: commands.Context, enabled: bool) -> None:
+        """Act on accounts flagged by any server's ban-trap as soon as they join."""
+        assert ctx.guild is not None
+        await self.settings.guild(ctx.guild).join_guard.set(enabled)
+        if enabled:
+            self._join_guard_guild_ids.add(ctx.guild.id)
+            text = "Accounts that triggered a ban-trap in any server will be moderated when they join."
+        else:
+            self._join_guard_guild_ids.discard(ctx.guild.id)
+            text = "Flagged accounts will no longer be checked when they join."
+        await ctx.send(
+            view=MessageView("Join guard updated", text, colour=discord.Colour.green()),
+            ephemeral=True,
+        )
+
+    @bantrap.command(  # pyright: ignore[reportArgumentType]
+        name="spam-sweep",
+        description="Remove copies of trapped messages posted in other channels.",
+    )
+    @app_commands.describe(
+        enabled="Whether copies of trapped messages and their authors should be moderated."
+    )
+    async def bantrap_spam_sweep(self, ctx: commands.Context, enabled: bool) -> None:
+        """Match new messages against recently trapped content in every channel."""
+        assert ctx.guild is not None
+        await self.settings.guild(ctx.guild).spam_sweep.set(enabled)
+        if enabled:
+            self._spam_sweep_guild_ids.add(ctx.guild.id)
+            text = (
+                "For ten minutes after a ban-trap hit, messages with the same content "
+                "in other channels will be deleted and their authors moderated."
+            )
+        else:
+            self._spam_sweep_guild_ids.discard(ctx.guild.id)
+            text = "Copies of trapped messages will no longer be removed."
+        await ctx.send(
+            view=MessageView("Spam sweep updated", text, colour=discord.Colour.green()),
+            ephemeral=True,
+        )
+
+    @bantrap.command(  # pyright: ignore[reportArgumentType]
+        name="action",
+        description="Choose what happens to members who trigger the ban-trap.",
+    )
+    @app_commands.describe(policy="The moderation action to take.")
+    async def bantrap_action(
+        self, ctx: commands.Context, policy: BanTrapAction
+    ) -> None:
+        """Set the moderation action for ban-trap hits, flagged joins and spam copies."""
+        assert ctx.guild is not None
+        missing = self._missing_permissions(ctx.guild, policy)
+        if missing:
+            await ctx.send(
+                view=MessageView(
+                    "Missing permissions",
+                    f"I need these permissions to {ACTION_NAMES[policy]} members: "
+                    + ", ".join(missing),
+                    colour=discord.Colour.red(),
+                ),
+                ephemeral=True,
+            )
+            return
+        await self.settings.guild(ctx.guild).action.set(policy)
+        self._actions[ctx.guild.id] = policy
+        text = f"Members who trigger the ban-trap will receive {ACTION_DESCRIPTIONS[policy]}."
+        if not await self._update_warning(ctx.guild, policy):
+            text += (
+                " I could not update the warning in the ban-trap channel, so please "
+                "edit it and the channel topic by hand."
+            )
+        await ctx.send(
+            view=MessageView("Action updated", text, colour=discord.Colour.green()),
+            ephemeral=True,
+        )
+
+    @bantrap.command(  # pyright: ignore[reportArgumentType]
+        name="unflag",
+        description="Remove an account from the shared list of ban-trap accounts.",
+    )
+    @commands.is_owner()
+    @app_commands.describe(user="The recovered account to remove from the list.")
+    async def bantrap_unflag(self, ctx: commands.Context, user: discord.User) -> None:
+        """Stop treating an account as compromised, for example after it was recovered."""
+        if self._events.unflag(user.id):
+            view = MessageView(
+                "Account unflagged",
+                f"{user.mention} (`{user.id}`) will no longer be acted on when joining.",
+                colour=discord.Colour.green(),
+            )
+        else:
+            view = MessageView(
+                "Account not flagged",
+                f"{user.mention} (`{user.id}`) has not triggered a ban-trap.",
+                colour=discord.Colour.orange(),
+            )
+        await ctx.send(
+            view=view, allowed_mentions=discord.AllowedMentions.none(), ephemeral=True
+        )
+
+    @bantrap.command(  # pyright: ignore[reportArgumentType]
+        name="history", description="Show recorded ban-trap events."
+    )
+    @app_commands.describe(
+        user="Only show events for this user.",
+        page="The page of results to show, newest first.",
+    )
+    async def bantrap_history(
+        self,
+        ctx: commands.Context,
+        user: discord.User | None = None,
+        page: commands.Range[int, 1] = 1,
+    ) -> None:
+        """Show recorded ban-trap events for the server or a single user."""
+        assert ctx.guild is not None
+        total, events = await self._events.history(
+            ctx.guild.id,
+            user.id if user is not None else None,
+            limit=HISTORY_PAGE_SIZE,
+            offset=(page - 1) * HISTORY_PAGE_SIZE,
+        )
+        pages = max(1, -(-total // HISTORY_PAGE_SIZE))
+        if not events:
+            text = (
+                "No ban-trap events were recorded."
+                if page == 1
+                else "This page is empty."
+            )
+        else:
+            text = "\n".join(
+                f"- <t:{int(event.created_at)}:f> <@{event.member_id}> (`{event.member_id}`) "
+                f"{f'in <#{event.channel_id}>' if event.channel_id else 'on join'}: "
+                f"{EVENT_LABELS[event.kind]}"
+                for event in events
+            )
+        await ctx.send(
+            view=MessageView(
+                "Ban-trap history",
+                f"{text}\n-# Page {page} of {pages}, {total} events",
+            ),
+            allowed_mentions=discord.AllowedMentions.none(),
+            ephemeral=True,
+        )
+
+    @bantrap.command(  # pyright: ignore[reportArgumentType]
+        name="stats", description="Summarise recent ban-trap events."
+    )
+    @app_commands.describe(days="How many days to look back.")
+    async def bantrap_stats(
+        self, ctx: commands.Context, days: commands.Range[int, 1, 365] = 7
+    ) -> None:
+        """Summarise ban-trap events of the last days."""
+        assert ctx.guild is not None
+        since = time.time() - days * 86_400
+        counts, members = await self._events.stats(ctx.guild.id, since)
+        durations = await self._events.action_durations(ctx.guild.id, since)
+        lines = [
+            f"> **{label}:** {counts.get(kind, 0)}"
+            for kind, label in EVENT_LABELS.items()
+        ]
+        lines.append(f"> **Distinct members:** {members}")
+        if durations:
+            lines.append("### Action latency")
+            lines.extend(
+                f"> **{ACTION_NAMES[action].capitalize()}:** {count} actions, "
+                f"{average * 1000:.0f} ms on average"
+                for action, (count, average) in durations.items()
+            )
+        await ctx.send(
+            view=MessageView(
+                f"Ban-trap statistics for the last {days} days", "\n".join(lines)
+            ),
+            ephemeral=True,
+        )
+
     @commands.Cog.listener("on_message")
     async def on_bantrap_message(self, message: discord.Message) -> None:
+        # Almost every message is outside a trap channel, so check that first.
+        if message.channel.id not in self._trap_channel_ids:
+            return
+
         guild = message.guild
-        if (
-            guild is None
-            or message.author.bot
-            or not isinstance(message.author, discord.Member)
-        ):
+        if guild is None:
             return
+        if message.id > self._checkpoints.get(message.channel.id, 0):
+            self._checkpoints[message.channel.id] = message.id
+            self._unsaved_checkpoints[guild.id] = message.id
 
-        channel_id: int | None = await self.settings.guild(guild).channel_id()
-        if channel_id is None or message.channel.id != channel_id:
+        if message.author.bot or not isinstance(message.author, discord.Member):
             return
 
         member = message.author
         key = (guild.id, member.id)
-        if key in self._members_in_progress:
+        if key in self._recent_actions or key in self._jobs:
             return
+        self._recent_actions.add(key)
 
-        await self._send_detected_message_log(message)
+        self._send_detected_message_log(message)
+        self._events.record(guild.id, member.id, message.channel.id, "triggered")
 
         # Never act on the server owner or a member the bot cannot moderate.
         bot_member = guild.me
@@ -182,121 +622,590 @@ class BanTrap(commands.Cog):
                 member.id,
                 message.channel.id,
             )
-            await self._send_log(
+            self._send_log(
                 guild,
                 "Moderation skipped",
                 f"{member.mention} (`{member.id}`) wrote in <#{message.channel.id}>, "
                 "but I cannot moderate them because of the role hierarchy.",
                 discord.Colour.orange(),
             )
+            self._events.record(guild.id, member.id, message.channel.id, "skipped")
             return
 
-        self._members_in_progress.add(key)
+        self._events.flag(member.id, guild.id)
+        if guild.id in self._spam_sweep_guild_ids and (
+            fingerprint := fingerprint_message(message.content, message.attachments)
+        ):
+            self._fingerprints.add(guild.id, fingerprint)
+        await self._queue_action(guild, member.id, message.channel.id, message.id)
+
+    @commands.Cog.listener("on_message")
+    async def on_bantrap_spam_copy(self, message: discord.Message) -> None:
+        guild = message.guild
+        # Only guilds with a recent trap hit have fingerprints to match against.
+        if (
+            guild is None
+            or guild.id not in self._spam_sweep_guild_ids
+            or not self._fingerprints.is_active(guild.id)
+            or message.channel.id in self._trap_channel_ids
+            or message.author.bot
+            or not isinstance(message.author, discord.Member)
+        ):
+            return
+        fingerprint = fingerprint_message(message.content, message.attachments)
+        if fingerprint is None or (guild.id, fingerprint) not in self._fingerprints:
+            return
+
+        member = message.author
+        if member == guild.owner or member.top_role >= guild.me.top_role:
+            return
+
+        # Every copy is deleted, since a timeout or kick does not purge the
+        # member's messages. Only the action is queued once.
         try:
-            await self._softban(member, message)
-        finally:
-            self._members_in_progress.discard(key)
+            await message.delete()
+        except discord.HTTPException:
+            log.warning(
+                "Could not delete a copy of trapped spam in guild %s",
+                guild.id,
+                exc_info=True,
+            )
+        self._events.record(guild.id, member.id, message.channel.id, "spam_copy")
+        key = (guild.id, member.id)
+        if key in self._recent_actions or key in self._jobs:
+            return
+        self._recent_actions.add(key)
+
+        self._send_log(
+            guild,
+            "Spam copy removed",
+            f"{member.mention} (`{member.id}`) posted a copy of a trapped message in "
+            f"<#{message.channel.id}> and triggered "
+            f"{ACTION_DESCRIPTIONS[self._actions.get(guild.id, 'softban')]}.",
+            discord.Colour.orange(),
+        )
+        await self._queue_action(guild, member.id, message.channel.id, message.id)
+
+    @commands.Cog.listener("on_resumed")
+    async def on_bantrap_resumed(self) -> None:
+        self._start_catch_up()
+
+    def _start_catch_up(self) -> None:
+        if self._catch_up_task is None or self._catch_up_task.done():
+            self._catch_up_task = asyncio.create_task(self._catch_up())
+
+    async def _catch_up(self) -> None:
+        """Feed trap channel messages posted while the bot was offline to the listener."""
+        await self.bot.wait_until_red_ready()
+        # Channels are scanned one after another to keep the request rate low, and
+        # take turns a batch at a time until every checkpoint has caught up.
+        channel_ids = list(self._trap_channel_ids)
+        while channel_ids:
+            channel_ids = [
+                channel_id
+                for channel_id in channel_ids
+                if await self._catch_up_channel(channel_id)
+            ]
 
-    async def _softban(self, member: discord.Member, message: discord.Message) -> None:
-        reason = f"Sent a message in ban-trap channel #{message.channel} ({message.channel.id})"
+    async def _catch_up_channel(self, channel_id: int) -> bool:
+        """Scan one batch of missed messages. Returns whether more may follow."""
+        channel = self.bot.get_channel(channel_id)
+        if not isinstance(channel, discord.TextChannel):
+            return False
 
+        checkpoint = self._checkpoints.get(channel_id)
+        if checkpoint is None:
+            # Without a checkpoint, start from now instead of rescanning everything.
+            if channel.last_message_id is not None:
+                self._checkpoints[channel_id] = channel.last_message_id
+                self._unsaved_checkpoints[channel.guild.id] = channel.last_message_id
+            return False
+
+        scanned = 0
         try:
-            await member.timeout(timedelta(days=3), reason=reason)
-            await member.ban(delete_message_seconds=604_800, reason=reason)
+            async for message in channel.history(
+                limit=CATCH_UP_LIMIT,
+                after=discord.Object(checkpoint),
+                oldest_first=True,
+            ):
+                scanned += 1
+                await self.on_bantrap_message(message)
+        except discord.HTTPException:
+            log.warning(
+                "Could not read missed messages in ban-trap channel %s",
+                channel_id,
+                exc_info=True,
+            )
+            return False
+        # The listener moved the checkpoint, unless the channel was removed meanwhile.
+        return (
+            scanned == CATCH_UP_LIMIT
+            and self._checkpoints.get(channel_id, checkpoint) > checkpoint
+        )
+
+    @tasks.loop(seconds=CHECKPOINT_FLUSH_INTERVAL)
+    async def _checkpoint_loop(self) -> None:
+        await self._save_checkpoints()
+
+    async def _save_checkpoints(self) -> None:
+        checkpoints, self._unsaved_checkpoints = self._unsaved_checkpoints, {}
+        for guild_id, message_id in checkpoints.items():
+            await self.settings.guild_from_id(guild_id).last_message_id.set(message_id)
+
+    @commands.Cog.listener("on_guild_channel_delete")
+    async def on_bantrap_channel_delete(
+        self, channel: discord.abc.GuildChannel
+    ) -> None:
+        if channel.id not in self._trap_channel_ids:
+            return
+        self._trap_channel_ids.discard(channel.id)
+        self._checkpoints.pop(channel.id, None)
+        self._unsaved_checkpoints.pop(channel.guild.id, None)
+        guild_settings = self.settings.guild(channel.guild)
+        await guild_settings.channel_id.clear()
+        await guild_settings.last_message_id.clear()
+        await guild_settings.warning_message_id.clear()
+
+    @commands.Cog.listener("on_member_join")
+    async def on_bantrap_member_join(self, member: discord.Member) -> None:
+        guild = member.guild
+        if (
+            guild.id not in self._join_guard_guild_ids
+            or not self._events.is_flagged(member.id)
+            or member.bot
+        ):
+            return
+
+        key = (guild.id, member.id)
+        # Only a pending action makes a join redundant. A recent trap hit does
+        # not, since a soft-banned member can rejoin right away.
+        if key in self._jobs:
+            return
+        self._recent_actions.add(key)
+
+        self._send_log(
+            guild,
+            "Flagged account joined",
+            f"{member.mention} (`{member.id}`) previously triggered a ban-trap and "
+            "will be moderated before they can post.",
+            discord.Colour.orange(),
+        )
+        self._events.record(guild.id, member.id, None, "joined")
+        await self._queue_action(guild, member.id, None, None)
+
+    async def _queue_action(
+        self,
+        guild: discord.Guild,
+        member_id: int,
+        channel_id: int | None,
+        message_id: int | None,
+    ) -> None:
+        action = self._actions.get(guild.id, "softban")
+        guild_settings = self.settings.guild(guild)
+        # Only bans have a bulk endpoint, so raid mode leaves other actions alone.
+        raid = action in ("softban", "ban") and await guild_settings.raid_mode()
+        job: SoftBanJob = {
+            "guild_id": guild.id,
+            "member_id": member_id,
+            "channel_id": channel_id,
+            "message_id": message_id,
+            "action": action,
+            "step": "ban",
+            "attempts": 0,
+            "due_at": time.time(),
+            "raid": raid,
+            "elapsed": 0.0,
+        }
+        if raid:
+            # Every hit of a wave shares one deadline, so they are banned together.
+            deadline = self._raid_deadlines.get(guild.id, 0.0)
+            if deadline <= job["due_at"]:
+                deadline = job["due_at"] + await guild_settings.raid_window()
+                self._raid_deadlines[guild.id] = deadline
+            job["due_at"] = deadline
+        await self._jobs.put(job)
+
+    async def _run_jobs(self, guild_id: int, jobs: list[SoftBanJob]) -> None:
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            log.warning(
+                "Dropping %s ban-trap jobs for guild %s, which I am no longer in",
+                len(jobs),
+                guild_id,
+            )
+            for job in jobs:
+                await self._jobs.finish(job)
+            return
+        if guild.unavailable:
+            for job in jobs:
+                await self._jobs.retry(job)
+            return
+
+        raid_bans = [job for job in jobs if job["step"] == "ban" and job["raid"]]
+        unbans = [job for job in jobs if job["step"] == "unban"]
+        await asyncio.gather(
+            *(
+                self._limited(guild.id, self._run_raid_ban_jobs(guild, chunk))
+                for chunk in discord.utils.as_chunks(raid_bans, RAID_BAN_LIMIT)
+            ),
+            *(
+                self._limited(guild.id, self._run_action_job(guild, job))
+                for job in jobs
+                if job["step"] == "ban" and not job["raid"]
+            ),
+            self._run_unban_jobs(guild, unbans),
+        )
+
+    async def _limited(self, guild_id: int, action: Awaitable[T]) -> T:
+        """Run a moderation action within the guild's concurrency cap."""
+        slots = self._action_slots.get(guild_id)
+        if slots is None:
+            limit = self._action_limits.get(guild_id, DEFAULT_ACTION_LIMIT)
+            slots = self._action_slots[guild_id] = asyncio.Semaphore(limit)
+        async with slots:
+            return await action
+
+    async def _run_action_job(self, guild: discord.Guild, job: SoftBanJob) -> None:
+        if job["channel_id"] is None:
+            reason = "Joined with an account that previously triggered a ban-trap"
+            cause = "they joined with an account that previously triggered a ban-trap"
+        else:
+            channel = guild.get_channel(job["channel_id"])
+            reason = (
+                f"Sent a message in ban-trap channel #{channel} ({job['channel_id']})"
+            )
+            cause = f"they wrote in <#{job['channel_id']}>"
+        action = ACTION_NAMES[job["action"]]
+        mention = f"<@{job['member_id']}> (`{job['member_id']}`)"
+
+        start = time.perf_counter()
+        try:
+            if job["action"] == "timeout":
+                member = guild.get_member(job["member_id"])
+                if member is None:
+                    self._send_log(
+                        guild,
+                        "Moderation skipped",
+                        f"{mention} left before I could time them out after {cause}.",
+                        discord.Colour.orange(),
+                    )
+                    await self._finish_job(job, "skipped")
+                    return
+                await member.timeout(timedelta(days=3), reason=reason)
+            elif job["action"] == "kick":
+                await guild.kick(discord.Object(job["member_id"]), reason=reason)
+                await self._delete_trapped_message(guild, job)
+            else:
+                await guild.ban(
+                    discord.Object(job["member_id"]),
+                    delete_message_seconds=604_800,
+                    reason=reason,
+                )
         except discord.Forbidden:
             log.warning(
-                "Missing permission or role hierarchy prevented soft-banning member %s in guild %s",
-                member.id,
-                member.guild.id,
+                "Missing permission or role hierarchy prevented the %s of member %s in guild %s",
+                job["action"],
+                job["member_id"],
+                guild.id,
+            )
+            self._send_log(
+                guild,
+                f"{action.capitalize()} failed",
+                f"I could not {job['action']} {mention} after {cause}. "
+                "Check my permissions and role position.",
+                discord.Colour.red(),
+            )
+            await self._finish_job(job, "ban_failed")
+            return
+        except TRANSIENT_ERRORS:
+            if await self._jobs.retry(job):
+                return
+            log.exception(
+                "Gave up the %s of member %s in guild %s after %s attempts",
+                job["action"],
+                job["member_id"],
+                guild.id,
+                job["attempts"],
             )
-            await self._send_log(
-                member.guild,
-                "Soft-ban failed",
-                f"I could not soft-ban {member.mention} (`{member.id}`) after they wrote in "
-                f"<#{message.channel.id}>. Check my permissions and role position.",
+            self._send_log(
+                guild,
+                f"{action.capitalize()} failed",
+                f"Discord kept failing the {action} of {mention} after {cause}.",
                 discord.Colour.red(),
             )
+            self._record(job, "ban_failed")
             return
         except discord.HTTPException:
             log.exception(
-                "Discord rejected the soft-ban for member %s in guild %s",
-                member.id,
-                member.guild.id,
+                "Discord rejected the %s of member %s in guild %s",
+                job["action"],
+                job["member_id"],
+                guild.id,
             )
-            await self._send_log(
-                member.guild,
-                "Soft-ban failed",
-                f"Discord rejected the soft-ban for {member.mention} (`{member.id}`) after "
-                f"they wrote in <#{message.channel.id}>.",
+            self._send_log(
+                guild,
+                f"{action.capitalize()} failed",
+                f"Discord rejected the {action} of {mention} after {cause}.",
                 discord.Colour.red(),
             )
+            await self._finish_job(job, "ban_failed")
             return
 
-        # A small delay avoids Discord occasionally processing the unban before the ban.
-        await asyncio.sleep(1)
+        job["elapsed"] += time.perf_counter() - start
+        if job["action"] == "softban":
+            # Discord confirmed the ban, so the unban can follow right away.
+            await self._jobs.advance(job, "unban", 0)
+        else:
+            await self._finish_job(job, ACTION_OUTCOMES[job["action"]])
+
+    async def _delete_trapped_message(
+        self, guild: discord.Guild, job: SoftBanJob
+    ) -> None:
+        channel = guild.get_channel(job["channel_id"]) if job["channel_id"] else None
+        if job["message_id"] is None or not isinstance(channel, discord.TextChannel):
+            return
         try:
-            await member.guild.unban(member, reason="Ban-trap soft-ban completed")
+            await channel.get_partial_message(job["message_id"]).delete()
+        except discord.NotFound:
+            pass
+        except discord.HTTPException:
+            log.warning(
+                "Could not delete the trapped message of member %s in guild %s",
+                job["member_id"],
+                guild.id,
+                exc_info=True,
+            )
+
+    async def _run_raid_ban_jobs(
+        self, guild: discord.Guild, jobs: list[SoftBanJob]
+    ) -> None:
+        jobs_by_member = {job["member_id"]: job for job in jobs}
+        reason = "Sent a message in the ban-trap channel during a raid"
+        start = time.perf_counter()
+        try:
+            result = await guild.bulk_ban(
+                [discord.Object(member_id) for member_id in jobs_by_member],
+                delete_message_seconds=604_800,
+                reason=reason,
+            )
+        except TRANSIENT_ERRORS:
+            abandoned = [job for job in jobs if not await self._jobs.retry(job)]
+            for job in abandoned:
+                self._record(job, "ban_failed")
+            if abandoned:
+                log.exception(
+                    "Gave up bulk banning %s members in guild %s",
+                    len(abandoned),
+                    guild.id,
+                )
+                self._send_members_log(
+                    guild,
+                    "Raid ban failed",
+                    "Discord kept failing to ban these members:",
+                    [job["member_id"] for job in abandoned],
+                    discord.Colour.red(),
+                )
+            return
         except discord.HTTPException:
             log.exception(
+                "Discord rejected the bulk ban of %s members in guild %s",
+                len(jobs),
+                guild.id,
+            )
+            self._send_members_log(
+                guild,
+                "Raid ban failed",
+                "Discord rejected the bulk ban for these members:",
+                list(jobs_by_member),
+                discord.Colour.red(),
+            )
+            for job in jobs:
+                await self._finish_job(job, "ban_failed")
+            return
+        # The request is shared, so each member is charged an equal part of it.
+        elapsed = (time.perf_counter() - start) / len(jobs)
+
+        if result.failed:
+            self._send_members_log(
+                guild,
+                "Raid ban failed",
+                "I could not ban these members. Check my permissions and role position:",
+                [user.id for user in result.failed],
+                discord.Colour.red(),
+            )
+        for user in result.failed:
+            await self._finish_job(jobs_by_member[user.id], "ban_failed")
+
+        banned: list[int] = []
+        for user in result.banned:
+            job = jobs_by_member[user.id]
+            job["elapsed"] += elapsed
+            if job["action"] == "softban":
+                await self._jobs.advance(job, "unban", 0)
+            else:
+                await self._finish_job(job, "banned")
+                banned.append(user.id)
+        if banned:
+            self._send_members_log(
+                guild,
+                "Raid ban completed",
+                "These members were banned together:",
+                banned,
+                discord.Colour.green(),
+            )
+
+    async def _run_unban_jobs(
+        self, guild: discord.Guild, jobs: list[SoftBanJob]
+    ) -> None:
+        unbanned: list[int] = []
+        unban_failed: list[int] = []
+        outcomes = await asyncio.gather(
+            *(self._limited(guild.id, self._unban(guild, job)) for job in jobs),
+            return_exceptions=True,
+        )
+        for job, outcome in zip(jobs, outcomes, strict=True):
+            if isinstance(outcome, discord.NotFound) and not await self._jobs.retry(
+                job
+            ):
+                # The ban was never processed or someone already lifted it, so the
+                # member is not banned anymore either way.
+                outcome = None
+            elif isinstance(outcome, discord.NotFound):
+                # Discord has not processed the ban yet, so try again shortly.
+                continue
+            if outcome is None:
+                await self._finish_job(job, "soft_banned")
+                if job["raid"]:
+                    unbanned.append(job["member_id"])
+                continue
+            if isinstance(outcome, TRANSIENT_ERRORS) and await self._jobs.retry(job):
+                continue
+
+            log.warning(
                 "Could not unban member %s after ban-trap soft-ban in guild %s",
-                member.id,
-                member.guild.id,
+                job["member_id"],
+                guild.id,
+                exc_info=outcome,
+            )
+            await self._finish_job(job, "unban_failed")
+            unban_failed.append(job["member_id"])
+
+        if unbanned:
+            self._send_members_log(
+                guild,
+                "Raid soft-ban completed",
+                "These members were banned together and unbanned again:",
+                unbanned,
+                discord.Colour.green(),
             )
-            await self._send_log(
-                member.guild,
+        if unban_failed:
+            self._send_members_log(
+                guild,
                 "Unban failed",
-                f"{member.mention} (`{member.id}`) was timed out and banned, but I could not "
-                "complete the automatic unban. Manual action is required.",
+                "These members were banned, but I could not complete the automatic "
+                "unban. Manual action is required:",
+                unban_failed,
                 discord.Colour.red(),
             )
-            return
 
-    async def _send_log(
+    async def _unban(self, guild: discord.Guild, job: SoftBanJob) -> None:
+        start = time.perf_counter()
+        await guild.unban(
+            discord.Object(job["member_id"]), reason="Ban-trap soft-ban completed"
+        )
+        job["elapsed"] += time.perf_counter() - start
+
+    async def _finish_job(self, job: SoftBanJob, kind: BanTrapEventKind) -> None:
+        self._record(job, kind)
+        await self._jobs.finish(job)
+
+    def _record(self, job: SoftBanJob, kind: BanTrapEventKind) -> None:
+        completed = kind in ACTION_OUTCOMES.values()
+        self._events.record(
+            job["guild_id"],
+            job["member_id"],
+            job["channel_id"],
+            kind,
+            action=job["action"],
+            duration=job["elapsed"] if completed else None,
+        )
+
+    def _send_log(
         self,
         guild: discord.Guild,
         title: str,
         text: str,
         colour: discord.Colour,
     ) -> None:
-        channel = await self._get_log_channel(guild)
-        if channel is None:
+        if guild.id not in self._log_channel_ids:
             return
+        self._logs.enqueue(guild.id, LogEvent(title, text, colour))
 
-        try:
-            await channel.send(
-                view=MessageView(title, text, colour=colour),
-                allowed_mentions=discord.AllowedMentions.none(),
+    def _send_members_log(
+        self,
+        guild: discord.Guild,
+        title: str,
+        text: str,
+        member_ids: list[int],
+        colour: discord.Colour,
+    ) -> None:
+        # Keep each event small enough to share a digest with other events.
+        for chunk in discord.utils.as_chunks(member_ids, 20):
+            lines = "\n".join(
+                f"- <@{member_id}> (`{member_id}`)" for member_id in chunk
             )
-        except discord.HTTPException:
-            log.exception("Could not send a ban-trap event log in guild %s", guild.id)
+            self._send_log(guild, title, f"{text}\n{lines}", colour)
 
-    async def _send_detected_message_log(self, message: discord.Message) -> None:
+    def _send_detected_message_log(self, message: discord.Message) -> None:
         assert message.guild is not None
-        channel = await self._get_log_channel(message.guild)
+        text = (
+            f"{message.author.mention} (`{message.author.id}`) wrote in "
+            f"<#{message.channel.id}> and triggered "
+            f"{ACTION_DESCRIPTIONS[self._actions.get(message.guild.id, 'softban')]}."
+        )
+        quoted = text
+        if message.content:
+            content = discord.utils.escape_markdown(message.content[:200])
+            quoted += "\n>>> " + content
+        colour = discord.Colour.orange()
+        channel = self._get_log_channel(message.guild)
+        if channel is None or message.guild.id not in self._forward_guild_ids:
+            self._send_log(message.guild, "Ban-trap triggered", quoted, colour)
+            return
+
+        # The forward starts right away, since the action purges the message long
+        # before the digest is sent, but it runs in the background so the action
+        # never waits on the log channel's rate limit.
+        self._logs.forward(
+            message.guild.id,
+            message,
+            channel,
+            LogEvent(
+                "Ban-trap triggered",
+                text + " Their message was forwarded to this channel.",
+                colour,
+            ),
+            LogEvent("Ban-trap triggered", quoted, colour),
+        )
+
+    async def _send_log_digest(
+        self, guild_id: int, events: list[LogEvent], dropped: Counter[str]
+    ) -> None:
+        guild = self.bot.get_guild(guild_id)
+        channel = self._get_log_channel(guild) if guild is not None else None
         if channel is None:
             return
 
         try:
             await channel.send(
-                view=MessageView(
-                    "Soft-ban triggered",
-                    f"{message.author.mention} (`{message.author.id}`) wrote in "
-                    f"<#{message.channel.id}> and triggered a 3-day timeout plus a soft-ban "
-                    "with seven days of messages purged. Their message is forwarded below.",
-                    colour=discord.Colour.orange(),
-                ),
+                view=DigestView(events, dropped),
                 allowed_mentions=discord.AllowedMentions.none(),
             )
-            await message.forward(channel)
         except discord.HTTPException:
-            log.exception(
-                "Could not forward a ban-trap message in guild %s", message.guild.id
-            )
+            log.exception("Could not send a ban-trap event log in guild %s", guild_id)
 
-    async def _get_log_channel(
-        self, guild: discord.Guild
-    ) -> discord.TextChannel | None:
-        channel_id: int | None = await self.settings.guild(guild).log_channel_id()
+    def _get_log_channel(self, guild: discord.Guild) -> discord.TextChannel | None:
+        channel_id = self._log_channel_ids.get(guild.id)
         if channel_id is None:
             return None
 
@@ -304,12 +1213,65 @@ class BanTrap(commands.Cog):
         return channel if isinstance(channel, discord.TextChannel) else None
 
     @staticmethod
-    def _warning_view() -> MessageView:
+    def _missing_permissions(guild: discord.Guild, action: BanTrapAction) -> list[str]:
+        """Return the permissions the bot lacks to carry out the action."""
+        permissions = guild.me.guild_permissions
+        return [
+            name.replace("_", " ").title()
+            for name in ACTION_PERMISSIONS[action]
+            if not getattr(permissions, name)
+        ]
+
+    async def _update_warning(
+        self, guild: discord.Guild, action: BanTrapAction
+    ) -> bool:
+        """Describe a new action in the trap channel's warning and topic.
+
+        Returns ``False`` if there is a trap channel that could not be updated.
+        """
+        guild_settings = self.settings.guild(guild)
+        channel_id: int | None = await guild_settings.channel_id()
+        channel = guild.get_channel(channel_id) if channel_id else None
+        if not isinstance(channel, discord.TextChannel):
+            return True
+
+        warning_id: int | None = await guild_settings.warning_message_id()
+        try:
+            if warning_id is None:
+                # Channels set up before the warning was stored start with it.
+                async for message in channel.history(limit=1, oldest_first=True):
+                    if message.author == guild.me:
+                        warning_id = message.id
+                        await guild_settings.warning_message_id.set(warning_id)
+            if warning_id is None:
+                return False
+            await channel.get_partial_message(warning_id).edit(
+                view=self._warning_view(action)
+            )
+            await channel.edit(topic=self._warning_topic(action))
+        except discord.HTTPException:
+            log.warning(
+                "Could not update the ban-trap warning in guild %s",
+                guild.id,
+                exc_info=True,
+            )
+            return False
+        return True
+
+    @staticmethod
+    def _warning_topic(action: BanTrapAction) -> str:
+        return (
+            "Do not send messages here. "
+            f"Doing so triggers an automatic {ACTION_NAMES[action]}."
+        )
+
+    @staticmethod
+    def _warning_view(action: BanTrapAction) -> MessageView:
         return MessageView(
             ":warning: DON'T SEND MESSAGES HERE :warning:",
             (
                 "This channel is a trap for compromised and malicious accounts. "
-                "**Sending a message** here will result in an automatic **3-day soft-ban**."
+                f"**Sending a message** here will result in an automatic **{ACTION_NAMES[action]}**."
             ),
             colour=discord.Colour.red(),
         )
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Hashable
+from typing import Generic, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+
+class TTLSet(Generic[K]):
+    """A set whose entries expire ``ttl`` seconds after they were last added.
+
+    Entries are kept in insertion order, and since every entry lives equally long
+    the oldest ones are always at the front. Expired entries are pruned from the
+    front on insertion, so both lookups and insertions are amortised O(1).
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._expiries: dict[K, float] = {}
+
+    def __contains__(self, key: K) -> bool:
+        expires_at = self._expiries.get(key)
+        return expires_at is not None and expires_at > time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._expiries)
+
+    def discard(self, key: K) -> None:
+        self._expiries.pop(key, None)
+
+    def add(self, key: K) -> None:
+        now = time.monotonic()
+        self._expiries.pop(key, None)
+        self._expiries[key] = now + self.ttl
+        while self._expiries:
+            oldest = next(iter(self._expiries))
+            if self._expiries[oldest] > now:
+                break
+            del self._expiries[oldest]
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import hashlib
+import time
+import unicodedata
+from collections.abc import Sequence
+
+import discord
+
+from .cache import TTLSet
+
+# Shorter texts ("hi", "test") are too common to be treated as spam on their own.
+MIN_TEXT_LENGTH = 16
+
+
+def normalize_content(content: str) -> str:
+    """Fold the cosmetic differences spammers use to dodge exact matching."""
+    text = unicodedata.normalize("NFKC", content).casefold()
+    # Drop invisible format characters such as zero-width spaces.
+    text = "".join(char for char in text if unicodedata.category(char) != "Cf")
+    return " ".join(text.split())
+
+
+def fingerprint_message(
+    content: str, attachments: Sequence[discord.Attachment]
+) -> bytes | None:
+    """Hash a message's normalized text and attachments.
+
+    Attachments are identified by their metadata rather than their bytes, so
+    fingerprinting never downloads anything. Returns ``None`` for messages too
+    generic to fingerprint safely.
+    """
+    text = normalize_content(content)
+    if len(text) < MIN_TEXT_LENGTH and not attachments:
+        return None
+
+    digest = hashlib.blake2b(text.encode(), digest_size=16)
+    for key in sorted(
+        f"{attachment.size}:{attachment.content_type}:{attachment.width}x{attachment.height}"
+        for attachment in attachments
+    ):
+        digest.update(b"\0" + key.encode())
+    return digest.digest()
+
+
+class FingerprintIndex:
+    """A rolling, per-guild index of recently trapped message fingerprints."""
+
+    def __init__(self, ttl: float) -> None:
+        self._ttl = ttl
+        self._fingerprints = TTLSet[tuple[int, bytes]](ttl)
+        self._active_until: dict[int, float] = {}
+
+    def add(self, guild_id: int, fingerprint: bytes) -> None:
+        self._fingerprints.add((guild_id, fingerprint))
+        self._active_until[guild_id] = time.monotonic() + self._ttl
+
+    def is_active(self, guild_id: int) -> bool:
+        """Whether the guild has any fingerprint that has not expired yet."""
+        return self._active_until.get(guild_id, 0.0) > time.monotonic()
+
+    def __contains__(self, key: tuple[int, bytes]) -> bool:
+        return key in self._fingerprints
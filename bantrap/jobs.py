@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import suppress
+from typing import TYPE_CHECKING
+
+from .types import BanTrapMemberSettings, SoftBanJob, SoftBanStep
+
+if TYPE_CHECKING:
+    from redbot.core import Config
+
+log = logging.getLogger("red.easysystem.bantrap.jobs")
+
+MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = 2.0
+RETRY_MAX_DELAY = 300.0
+
+JobHandler = Callable[[int, list[SoftBanJob]], Awaitable[None]]
+FinishHandler = Callable[[tuple[int, int]], None]
+
+
+class JobQueue:
+    """Persist soft-ban jobs in Config and run them from a background worker.
+
+    A job is stored under its member and rewritten whenever it advances to the
+    next step, so a restart between the ban and the unban resumes the unban.
+    Due jobs are handed to the handler in one batch per guild, and ``on_finish``
+    is called with the guild and member ID of every job that is done or dropped.
+    """
+
+    def __init__(
+        self,
+        settings: Config,
+        handler: JobHandler,
+        on_finish: FinishHandler | None = None,
+    ) -> None:
+        self._settings = settings
+        self._handler = handler
+        self._on_finish = on_finish
+        self._jobs: dict[tuple[int, int], SoftBanJob] = {}
+        self._running: set[tuple[int, int]] = set()
+        self._wakeup = asyncio.Event()
+        self._worker: asyncio.Task[None] | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def __contains__(self, key: tuple[int, int]) -> bool:
+        return key in self._jobs
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    async def load(self) -> None:
+        all_members: dict[
+            int, dict[int, BanTrapMemberSettings]
+        ] = await self._settings.all_members()
+        for guild_id, members in all_members.items():
+            for member_id, member_settings in members.items():
+                job = member_settings["soft_ban_job"]
+                if job is not None:
+                    # Jobs stored before actions were configurable are soft-bans.
+                    job.setdefault("action", "softban")
+                    job.setdefault("message_id", None)
+                    job.setdefault("elapsed", 0.0)
+                    self._jobs[guild_id, member_id] = job
+        if self._jobs:
+            log.info("Resuming %s pending ban-trap jobs", len(self._jobs))
+
+    def start(self, wait_until_ready: Callable[[], Awaitable[object]]) -> None:
+        self._worker = asyncio.create_task(self._run(wait_until_ready))
+
+    async def close(self) -> None:
+        """Stop the worker. Unfinished jobs stay stored and resume on the next load."""
+        if self._worker is not None:
+            self._worker.cancel()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(
+            *self._tasks,
+            *([self._worker] if self._worker else []),
+            return_exceptions=True,
+        )
+
+    async def put(self, job: SoftBanJob) -> None:
+        await self._store(job)
+        self._wakeup.set()
+
+    async def advance(self, job: SoftBanJob, step: SoftBanStep, delay: float) -> None:
+        """Move a job to its next step, due after ``delay`` seconds."""
+        job["step"] = step
+        job["attempts"] = 0
+        job["due_at"] = time.time() + delay
+        await self._store(job)
+
+    async def finish(self, job: SoftBanJob) -> None:
+        key = (job["guild_id"], job["member_id"])
+        self._jobs.pop(key, None)
+        await self._settings.member_from_ids(*key).soft_ban_job.clear()
+        if self._on_finish is not None:
+            self._on_finish(key)
+
+    async def retry(self, job: SoftBanJob) -> bool:
+        """Reschedule a job with jittered exponential backoff.
+
+        Returns ``False`` and drops the job once it has used all its attempts.
+        """
+        job["attempts"] += 1
+        if job["attempts"] >= MAX_ATTEMPTS:
+            await self.finish(job)
+            return False
+
+        delay = min(RETRY_BASE_DELAY * 2 ** job["attempts"], RETRY_MAX_DELAY)
+        job["due_at"] = time.time() + random.uniform(delay / 2, delay)
+        await self._store(job)
+        return True
+
+    async def _store(self, job: SoftBanJob) -> None:
+        key = (job["guild_id"], job["member_id"])
+        self._jobs[key] = job
+        await self._settings.member_from_ids(*key).soft_ban_job.set(job)
+
+    async def _run(self, wait_until_ready: Callable[[], Awaitable[object]]) -> None:
+        await wait_until_ready()
+        while True:
+            self._wakeup.clear()
+            now = time.time()
+            due: dict[int, list[SoftBanJob]] = {}
+            next_due: float | None = None
+            for key, job in self._jobs.items():
+                if key in self._running:
+                    continue
+                if job["due_at"] <= now:
+                    due.setdefault(job["guild_id"], []).append(job)
+                elif next_due is None or job["due_at"] < next_due:
+                    next_due = job["due_at"]
+
+            for guild_id, jobs in due.items():
+                self._running.update((guild_id, job["member_id"]) for job in jobs)
+                task = asyncio.create_task(self._dispatch(guild_id, jobs))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+            timeout = None if next_due is None else max(next_due - now, 0)
+            with suppress(TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+
+    async def _dispatch(self, guild_id: int, jobs: list[SoftBanJob]) -> None:
+        try:
+            await self._handler(guild_id, jobs)
+        except Exception:
+            log.exception(
+                "Unexpected error while running ban-trap jobs in guild %s", guild_id
+            )
+            for job in jobs:
+                if (job["guild_id"], job["member_id"]) in self._jobs:
+                    await self.retry(job)
+        finally:
+            self._running.difference_update(
+                (guild_id, job["member_id"]) for job in jobs
+            )
+            self._wakeup.set()
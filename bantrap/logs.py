@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import Counter, deque
+from collections.abc import Awaitable, Callable
+from typing import NamedTuple
+
+import discord
+
+log = logging.getLogger("red.easysystem.bantrap.logs")
+
+# A digest must stay below Discord's component count and total text limits.
+DIGEST_MAX_EVENTS = 10
+DIGEST_MAX_CHARACTERS = 3_500
+# Dropped forwards are reported under this title with the other dropped events.
+FORWARD_TITLE = "Forwarded message"
+
+
+class LogEvent(NamedTuple):
+    title: str
+    text: str
+    colour: discord.Colour
+
+
+DigestSender = Callable[[int, list[LogEvent], Counter[str]], Awaitable[None]]
+
+
+class LogPipeline:
+    """Buffer ban-trap log events and send them as one digest per guild and window.
+
+    Each guild has a bounded queue. Events that do not fit are dropped and counted
+    by title, and the counts are reported with the next digest. Messages can also be
+    forwarded to the log channel in the background, with at most ``max_forwards``
+    forwards in flight per guild.
+    """
+
+    def __init__(
+        self,
+        send_digest: DigestSender,
+        *,
+        max_pending: int = 100,
+        max_forwards: int = 5,
+    ) -> None:
+        self.windows: dict[int, int] = {}
+        self._send_digest = send_digest
+        self._max_pending = max_pending
+        self._max_forwards = max_forwards
+        self._pending: dict[int, deque[LogEvent]] = {}
+        self._dropped: dict[int, Counter[str]] = {}
+        self._tasks: dict[int, asyncio.Task[None]] = {}
+        self._forwards: dict[int, set[asyncio.Task[None]]] = {}
+
+    def enqueue(self, guild_id: int, event: LogEvent) -> None:
+        pending = self._pending.setdefault(guild_id, deque())
+        if len(pending) >= self._max_pending:
+            self._dropped.setdefault(guild_id, Counter())[event.title] += 1
+        else:
+            pending.append(event)
+
+        if guild_id not in self._tasks:
+            self._tasks[guild_id] = asyncio.create_task(self._flush_later(guild_id))
+
+    def forward(
+        self,
+        guild_id: int,
+        message: discord.Message,
+        channel: discord.TextChannel,
+        event: LogEvent,
+        fallback: LogEvent,
+    ) -> None:
+        """Forward a message to the log channel without waiting for it.
+
+        ``event`` is logged once the message was forwarded, and ``fallback`` if it
+        could not be, or if too many forwards are already running in the guild.
+        """
+        forwards = self._forwards.setdefault(guild_id, set())
+        if len(forwards) >= self._max_forwards:
+            self._dropped.setdefault(guild_id, Counter())[FORWARD_TITLE] += 1
+            self.enqueue(guild_id, fallback)
+            return
+
+        task = asyncio.create_task(
+            self._forward(guild_id, message, channel, event, fallback)
+        )
+        forwards.add(task)
+        task.add_done_callback(forwards.discard)
+
+    async def close(self) -> None:
+        """Cancel the pending timers and send everything that is still buffered."""
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+        for forwards in self._forwards.values():
+            for task in forwards:
+                task.cancel()
+        self._forwards.clear()
+        for guild_id in list(self._pending.keys() | self._dropped.keys()):
+            while self._pending.get(guild_id) or self._dropped.get(guild_id):
+                await self._flush(guild_id)
+
+    async def _forward(
+        self,
+        guild_id: int,
+        message: discord.Message,
+        channel: discord.TextChannel,
+        event: LogEvent,
+        fallback: LogEvent,
+    ) -> None:
+        try:
+            await message.forward(channel)
+        except discord.HTTPException:
+            log.warning(
+                "Could not forward a ban-trap message in guild %s",
+                guild_id,
+                exc_info=True,
+            )
+            event = fallback
+        self.enqueue(guild_id, event)
+
+    async def _flush_later(self, guild_id: int) -> None:
+        while self._pending.get(guild_id) or self._dropped.get(guild_id):
+            await asyncio.sleep(self.windows.get(guild_id, 5))
+            await self._flush(guild_id)
+        del self._tasks[guild_id]
+
+    async def _flush(self, guild_id: int) -> None:
+        pending = self._pending.get(guild_id, deque[LogEvent]())
+        events: list[LogEvent] = []
+        characters = 0
+        while pending and len(events) < DIGEST_MAX_EVENTS:
+            characters += len(pending[0].title) + len(pending[0].text)
+            if events and characters > DIGEST_MAX_CHARACTERS:
+                break
+            events.append(pending.popleft())
+        if not pending:
+            self._pending.pop(guild_id, None)
+
+        dropped = self._dropped.pop(guild_id, Counter[str]())
+        if dropped:
+            log.warning(
+                "Dropped %s ban-trap log events in guild %s because the queue was full",
+                dropped.total(),
+                guild_id,
+            )
+        try:
+            await self._send_digest(guild_id, events, dropped)
+        except Exception:
+            log.exception("Could not send a ban-trap log digest in guild %s", guild_id)
@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+from .types import BanTrapAction, BanTrapEventKind
+
+log = logging.getLogger("red.easysystem.bantrap.store")
+
+FLUSH_INTERVAL = 2.0
+FLUSH_THRESHOLD = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    member_id INTEGER NOT NULL,
+    channel_id INTEGER,
+    kind TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_by_guild ON events (guild_id, created_at);
+CREATE INDEX IF NOT EXISTS events_by_member ON events (guild_id, member_id, created_at);
+CREATE TABLE IF NOT EXISTS flagged_accounts (
+    member_id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    flagged_at REAL NOT NULL
+);
+"""
+# Each migration upgrades the schema by one version, tracked in PRAGMA user_version.
+MIGRATIONS = (
+    """
+    ALTER TABLE events ADD COLUMN action TEXT;
+    ALTER TABLE events ADD COLUMN duration REAL;
+    """,
+)
+
+
+class BanTrapEvent(NamedTuple):
+    guild_id: int
+    member_id: int
+    channel_id: int | None
+    kind: BanTrapEventKind
+    created_at: float
+    action: BanTrapAction | None = None
+    # Seconds spent in Discord requests, set for completed actions only.
+    duration: float | None = None
+
+
+class FlaggedAccount(NamedTuple):
+    member_id: int
+    guild_id: int
+    flagged_at: float
+
+
+class EventStore:
+    """An append-only SQLite log of ban-trap events and flagged accounts.
+
+    Events are buffered in memory and written in one transaction per flush from a
+    worker thread, so recording an event never waits on disk. Flagged account IDs
+    are also kept in a set, so checking an account needs no I/O at all.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._connection: sqlite3.Connection | None = None
+        self._pending: list[BanTrapEvent] = []
+        self._pending_flags: list[FlaggedAccount] = []
+        self._pending_unflags: list[int] = []
+        self._flagged: set[int] = set()
+        self._lock = asyncio.Lock()
+        self._flusher: asyncio.Task[None] | None = None
+        self._writes: set[asyncio.Task[None]] = set()
+
+    async def open(self) -> None:
+        self._connection = await asyncio.to_thread(self._connect)
+        self._flagged = await asyncio.to_thread(self._flagged_ids, self._connection)
+        self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def close(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+        # Writes started by a full buffer may still wait for the lock.
+        await asyncio.gather(*self._writes, return_exceptions=True)
+        await self.flush()
+        if self._connection is not None:
+            async with self._lock:
+                await asyncio.to_thread(self._connection.close)
+            self._connection = None
+
+    def record(
+        self,
+        guild_id: int,
+        member_id: int,
+        channel_id: int | None,
+        kind: BanTrapEventKind,
+        *,
+        action: BanTrapAction | None = None,
+        duration: float | None = None,
+    ) -> None:
+        self._pending.append(
+            BanTrapEvent(
+                guild_id, member_id, channel_id, kind, time.time(), action, duration
+            )
+        )
+        self._flush_soon()
+
+    def is_flagged(self, member_id: int) -> bool:
+        return member_id in self._flagged
+
+    def flag(self, member_id: int, guild_id: int) -> None:
+        if member_id in self._flagged:
+            return
+        self._flagged.add(member_id)
+        if member_id in self._pending_unflags:
+            self._pending_unflags.remove(member_id)
+        self._pending_flags.append(FlaggedAccount(member_id, guild_id, time.time()))
+        self._flush_soon()
+
+    def unflag(self, member_id: int) -> bool:
+        if member_id not in self._flagged:
+            return False
+        self._flagged.discard(member_id)
+        self._pending_flags = [
+            flag for flag in self._pending_flags if flag.member_id != member_id
+        ]
+        self._pending_unflags.append(member_id)
+        self._flush_soon()
+        return True
+
+    async def flush(self) -> None:
+        if self._connection is None or not (
+            self._pending or self._pending_flags or self._pending_unflags
+        ):
+            return
+        events, self._pending = self._pending, []
+        flags, self._pending_flags = self._pending_flags, []
+        unflags, self._pending_unflags = self._pending_unflags, []
+        async with self._lock:
+            try:
+                await asyncio.to_thread(
+                    self._write, self._connection, events, flags, unflags
+                )
+            except sqlite3.Error:
+                log.exception("Could not store %s ban-trap events", len(events))
+
+    async def history(
+        self, guild_id: int, member_id: int | None, *, limit: int, offset: int
+    ) -> tuple[int, list[BanTrapEvent]]:
+        """Return the total number of matching events and one page, newest first."""
+        await self.flush()
+        where = (
+            "guild_id = ?" if member_id is None else "guild_id = ? AND member_id = ?"
+        )
+        params = (guild_id,) if member_id is None else (guild_id, member_id)
+        async with self._lock:
+            return await asyncio.to_thread(
+                self._history, self._require_connection(), where, params, limit, offset
+            )
+
+    async def stats(
+        self, guild_id: int, since: float
+    ) -> tuple[dict[BanTrapEventKind, int], int]:
+        """Return the event counts by kind and the number of distinct members."""
+        await self.flush()
+        async with self._lock:
+            return await asyncio.to_thread(
+                self._stats, self._require_connection(), guild_id, since
+            )
+
+    async def action_durations(
+        self, guild_id: int, since: float
+    ) -> dict[BanTrapAction, tuple[int, float]]:
+        """Return the number of completed actions and their average duration."""
+        await self.flush()
+        async with self._lock:
+            return await asyncio.to_thread(
+                self._action_durations, self._require_connection(), guild_id, since
+            )
+
+    def _flush_soon(self) -> None:
+        if len(self._pending) + len(self._pending_flags) < FLUSH_THRESHOLD:
+            return
+        task = asyncio.create_task(self.flush())
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    def _require_connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            raise RuntimeError("The event store is not open")
+        return self._connection
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            await self.flush()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self._path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.executescript(SCHEMA)
+        (version,) = connection.execute("PRAGMA user_version").fetchone()
+        for number, migration in enumerate(MIGRATIONS[version:], version + 1):
+            connection.executescript(
+                f"BEGIN; {migration} PRAGMA user_version = {number}; COMMIT;"
+            )
+        return connection
+
+    @staticmethod
+    def _write(
+        connection: sqlite3.Connection,
+        events: list[BanTrapEvent],
+        flags: list[FlaggedAccount],
+        unflags: list[int],
+    ) -> None:
+        with connection:
+            connection.executemany(
+                "INSERT INTO events "
+                "(guild_id, member_id, channel_id, kind, created_at, action, duration) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                events,
+            )
+            connection.executemany(
+                "INSERT OR IGNORE INTO flagged_accounts (member_id, guild_id, flagged_at) "
+                "VALUES (?, ?, ?)",
+                flags,
+            )
+            connection.executemany(
+                "DELETE FROM flagged_accounts WHERE member_id = ?",
+                [(member_id,) for member_id in unflags],
+            )
+
+    @staticmethod
+    def _flagged_ids(connection: sqlite3.Connection) -> set[int]:
+        return {
+            member_id
+            for (member_id,) in connection.execute(
+                "SELECT member_id FROM flagged_accounts"
+            )
+        }
+
+    @staticmethod
+    def _history(
+        connection: sqlite3.Connection,
+        where: str,
+        params: tuple[int, ...],
+        limit: int,
+        offset: int,
+    ) -> tuple[int, list[BanTrapEvent]]:
+        (total,) = connection.execute(
+            f"SELECT COUNT(*) FROM events WHERE {where}", params
+        ).fetchone()
+        rows = connection.execute(
+            "SELECT guild_id, member_id, channel_id, kind, created_at FROM events "
+            f"WHERE {where} ORDER BY created_at DESC LIMIT ? OFFSET ?",
+            (*params, limit, offset),
+        ).fetchall()
+        return total, [BanTrapEvent(*row) for row in rows]
+
+    @staticmethod
+    def _stats(
+        connection: sqlite3.Connection, guild_id: int, since: float
+    ) -> tuple[dict[BanTrapEventKind, int], int]:
+        counts = dict(
+            connection.execute(
+                "SELECT kind, COUNT(*) FROM events "
+                "WHERE guild_id = ? AND created_at >= ? GROUP BY kind",
+                (guild_id, since),
+            ).fetchall()
+        )
+        (members,) = connection.execute(
+            "SELECT COUNT(DISTINCT member_id) FROM events "
+            "WHERE guild_id = ? AND created_at >= ?",
+            (guild_id, since),
+        ).fetchone()
+        return counts, members
+
+    @staticmethod
+    def _action_durations(
+        connection: sqlite3.Connection, guild_id: int, since: float
+    ) -> dict[BanTrapAction, tuple[int, float]]:
+        rows = connection.execute(
+            "SELECT action, COUNT(*), AVG(duration) FROM events "
+            "WHERE guild_id = ? AND created_at >= ? AND duration IS NOT NULL "
+            "GROUP BY action",
+            (guild_id, since),
+        ).fetchall()
+        return {action: (count, average) for action, count, average in rows}
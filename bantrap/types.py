@@ -1,8 +1,52 @@
 from __future__ import annotations
 
-from typing import TypedDict
+from typing import Literal, TypedDict
+
+SoftBanStep = Literal["ban", "unban"]
+BanTrapAction = Literal["softban", "timeout", "kick", "ban"]
+BanTrapEventKind = Literal[
+    "triggered",
+    "joined",
+    "spam_copy",
+    "skipped",
+    "soft_banned",
+    "banned",
+    "kicked",
+    "timed_out",
+    "ban_failed",
+    "unban_failed",
+]
 
 
 class BanTrapGuildSettings(TypedDict):
     channel_id: int | None
     log_channel_id: int | None
+    raid_mode: bool
+    raid_window: int
+    log_window: int
+    forward_messages: bool
+    max_concurrent_actions: int
+    join_guard: bool
+    spam_sweep: bool
+    last_message_id: int | None
+    warning_message_id: int | None
+    action: BanTrapAction
+
+
+class SoftBanJob(TypedDict):
+    guild_id: int
+    member_id: int
+    # None when the job was created for a flagged account joining the server.
+    channel_id: int | None
+    message_id: int | None
+    action: BanTrapAction
+    step: SoftBanStep
+    attempts: int
+    due_at: float
+    raid: bool
+    # Seconds spent in Discord requests, recorded once the job completes.
+    elapsed: float
+
+
+class BanTrapMemberSettings(TypedDict):
+    soft_ban_job: SoftBanJob | None
@@ -1,7 +1,14 @@
 from __future__ import annotations
 
+from collections import Counter
+from collections.abc import Sequence
+from typing import TYPE_CHECKING
+
 import discord
 
+if TYPE_CHECKING:
+    from .logs import LogEvent
+
 
 class MessageView(discord.ui.LayoutView):
     def __init__(
@@ -18,3 +25,27 @@ class MessageView(discord.ui.LayoutView):
                 accent_colour=colour or discord.Colour.blurple(),
             )
         )
+
+
+class DigestView(discord.ui.LayoutView):
+    def __init__(
+        self, events: Sequence[LogEvent], dropped: Counter[str] | None = None
+    ) -> None:
+        super().__init__()
+        for event in events:
+            self.add_item(
+                discord.ui.Container(
+                    discord.ui.TextDisplay(f"## {event.title}\n{event.text}"),
+                    accent_colour=event.colour,
+                )
+            )
+        if dropped:
+            summary = ", ".join(
+                f"{count} × {title}" for title, count in dropped.items()
+            )
+            self.add_item(
+                discord.ui.TextDisplay(
+                    f"-# The log queue was full and dropped {dropped.total()} "
+                    f"events: {summary}"
+                )
+            )
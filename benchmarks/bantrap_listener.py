@@ -0,0 +1,73 @@
+"""Measure how many non-trap messages the BanTrap listener rejects per second.
+
+Run from the repository root with ``python -m benchmarks.bantrap_listener``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Any
+
+from redbot.core import data_manager
+
+from bantrap.bantrap import BanTrap
+
+GUILD_COUNT = 50
+MESSAGES = 100_000
+
+
+async def legacy_listener(cog: BanTrap, message: Any) -> None:
+    """The listener prologue before the in-memory channel index existed."""
+    guild = message.guild
+    if guild is None or message.author.bot:
+        return
+    channel_id: int | None = await cog.settings.guild(guild).channel_id()
+    if channel_id is None or message.channel.id != channel_id:
+        return
+
+
+async def measure(name: str, listener: Any, messages: list[Any]) -> None:
+    start = time.perf_counter()
+    for message in messages:
+        await listener(message)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:>8}: {len(messages) / elapsed:>12,.0f} msg/s "
+        f"({elapsed * 1_000_000 / len(messages):.2f} µs/msg)"
+    )
+
+
+async def main() -> None:
+    data_manager.basic_config = data_manager.basic_config_default
+    data_manager.basic_config["DATA_PATH"] = tempfile.mkdtemp()
+
+    cog = BanTrap(SimpleNamespace())  # pyright: ignore[reportArgumentType]
+    guilds = [SimpleNamespace(id=guild_id) for guild_id in range(1, GUILD_COUNT + 1)]
+    for guild in guilds:
+        await cog.settings.guild_from_id(guild.id).channel_id.set(1_000_000 + guild.id)
+        # cog_load also starts the job queue and the catch-up scan, which need a
+        # real bot, so only the channel index the listener reads is filled in.
+        cog._trap_channel_ids.add(1_000_000 + guild.id)  # pyright: ignore[reportPrivateUsage]
+
+    author = SimpleNamespace(id=42, bot=False)
+    messages = [
+        SimpleNamespace(
+            guild=guilds[index % GUILD_COUNT],
+            channel=SimpleNamespace(id=2_000_000 + index % 500),
+            author=author,
+        )
+        for index in range(MESSAGES)
+    ]
+
+    async def before(message: Any) -> None:
+        await legacy_listener(cog, message)
+
+    await measure("before", before, messages)
+    await measure("after", cog.on_bantrap_message, messages)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,192 @@
+"""A local mock of the premium API and stand-ins for a guild, its members and roles.
+
+Serve a synthetic dataset with
+``python -m benchmarks.easyfnstats_mock --users 100000 --port 8080``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+from typing import Any
+
+from aiohttp import web
+
+from easyfnstats.types import PremiumUser
+
+SOURCES = ("paid", "paid", "paid", "paid", "grant", "patreon")
+FIRST_USER_ID = 100_000_000_000_000_000
+
+
+def synthetic_users(count: int, *, seed: int = 0) -> list[PremiumUser]:
+    """Create premium users with snowflake-sized IDs and a realistic source mix."""
+    rng = random.Random(seed)
+    user_ids = rng.sample(range(FIRST_USER_ID, FIRST_USER_ID + count * 10), count)
+    return [{"id": user_id, "source": rng.choice(SOURCES)} for user_id in user_ids]
+
+
+def mutate(
+    users: list[PremiumUser], change_rate: float, *, seed: int = 1
+) -> list[PremiumUser]:
+    """Remove, add and re-source ``change_rate`` of the users, a third each."""
+    rng = random.Random(seed)
+    changes = int(len(users) * change_rate)
+    removed = set(rng.sample(range(len(users)), changes // 3))
+    resourced = set(rng.sample(range(len(users)), changes // 3)) - removed
+    mutated: list[PremiumUser] = []
+    for index, user in enumerate(users):
+        if index in removed:
+            continue
+        if index in resourced:
+            source = "grant" if user["source"] != "grant" else "paid"
+            resourced_user: PremiumUser = {"id": user["id"], "source": source}
+            user = resourced_user
+        mutated.append(user)
+    top = max((user["id"] for user in users), default=FIRST_USER_ID)
+    mutated.extend(
+        {"id": top + offset, "source": rng.choice(SOURCES)}
+        for offset in range(1, changes - len(removed) - len(resourced) + 1)
+    )
+    return mutated
+
+
+class MockPremiumAPI:
+    """Serve a premium user list on ``/premium`` with ETag support.
+
+    The dataset can be replaced at any time with ``publish``. Requests carrying
+    the current ETag in ``If-None-Match`` get a 304, like the real API.
+    """
+
+    def __init__(self, users: list[PremiumUser] | None = None) -> None:
+        self.requests = 0
+        self._body = b"[]"
+        self._etag = ""
+        self._runner: web.AppRunner | None = None
+        self.publish(users or [])
+
+    @property
+    def url(self) -> str:
+        assert self._runner is not None
+        host, port = self._runner.addresses[0][:2]
+        return f"http://{host}:{port}/premium"
+
+    def publish(self, users: list[PremiumUser]) -> None:
+        self._body = json.dumps(users, separators=(",", ":")).encode()
+        self._etag = f'"{hashlib.blake2b(self._body, digest_size=8).hexdigest()}"'
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        app = web.Application()
+        app.router.add_get("/premium", self._premium)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _premium(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        if request.headers.get("If-None-Match") == self._etag:
+            return web.Response(status=304, headers={"ETag": self._etag})
+        return web.Response(
+            body=self._body,
+            content_type="application/json",
+            headers={"ETag": self._etag},
+        )
+
+
+class FakeRole:
+    def __init__(self, role_id: int, guild: FakeGuild) -> None:
+        self.id = role_id
+        self.name = f"role-{role_id}"
+        self.guild = guild
+        self.holders: set[int] = set()
+
+    @property
+    def members(self) -> list[FakeMember]:
+        return [self.guild.members[member_id] for member_id in self.holders]
+
+
+class FakeMember:
+    def __init__(self, member_id: int, guild: FakeGuild) -> None:
+        self.id = member_id
+        self.guild = guild
+        self.role_ids: set[int] = set()
+
+    def get_role(self, role_id: int) -> FakeRole | None:
+        return self.guild.roles[role_id] if role_id in self.role_ids else None
+
+    async def add_roles(self, role: FakeRole, *, reason: str | None = None) -> None:
+        await self.guild.request()
+        self.role_ids.add(role.id)
+        role.holders.add(self.id)
+
+    async def remove_roles(self, role: FakeRole, *, reason: str | None = None) -> None:
+        await self.guild.request()
+        self.role_ids.discard(role.id)
+        role.holders.discard(self.id)
+
+
+class FakeGuild:
+    """A guild whose role edits take ``latency`` seconds each, like a REST call.
+
+    With ``cached=False`` the member cache starts empty, and members have to be
+    fetched with ``query_members`` as on a bot with restricted member caching.
+    """
+
+    def __init__(self, guild_id: int, *, latency: float = 0.0, cached: bool = True):
+        self.id = guild_id
+        self.latency = latency
+        self.chunked = cached
+        self.members: dict[int, FakeMember] = {}
+        self.roles: dict[int, FakeRole] = {}
+        self.requests = 0
+        self._cached = cached
+
+    def add_member(self, member_id: int, *role_ids: int) -> FakeMember:
+        member = self.members[member_id] = FakeMember(member_id, self)
+        for role_id in role_ids:
+            member.role_ids.add(role_id)
+            self.roles[role_id].holders.add(member_id)
+        return member
+
+    def add_role(self, role_id: int) -> FakeRole:
+        role = self.roles[role_id] = FakeRole(role_id, self)
+        return role
+
+    def get_member(self, member_id: int) -> FakeMember | None:
+        return self.members.get(member_id) if self._cached else None
+
+    def get_role(self, role_id: int) -> FakeRole | None:
+        return self.roles.get(role_id)
+
+    async def query_members(self, *, user_ids: list[int], limit: int) -> list[Any]:
+        await self.request()
+        return [
+            self.members[user_id] for user_id in user_ids if user_id in self.members
+        ]
+
+    async def request(self) -> None:
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+
+
+async def serve(users: int, host: str, port: int) -> None:
+    api = MockPremiumAPI(synthetic_users(users))
+    await api.start(host, port)
+    print(f"Serving {users:,} premium users on {api.url}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    arguments = parser.parse_args()
+    asyncio.run(serve(arguments.users, arguments.host, arguments.port))
@@ -0,0 +1,175 @@
+"""Measure each stage of the premium role sync against the local mock API.
+
+For every user count and change rate, this times fetching the list from the
+mock API (and the 304 that follows), parsing a body, diffing two snapshots and
+applying the resulting role changes. Peak memory is measured with tracemalloc in
+a separate run of each stage, so tracing does not distort the timings.
+
+Run from the repository root with ``python -m benchmarks.easyfnstats_sync``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+
+from easyfnstats.client import CHUNK_SIZE, PremiumClient
+from easyfnstats.members import MemberResolver
+from easyfnstats.premium import PremiumStreamParser, PremiumUsers, parse_premium_users
+from easyfnstats.roles import RoleExecutor
+from easyfnstats.sync import PremiumSync
+
+from .easyfnstats_mock import FakeGuild, MockPremiumAPI, mutate, synthetic_users
+
+T = TypeVar("T")
+
+PREMIUM_ROLE_ID = 1
+EXCLUDED_ROLE_ID = 2
+# Share of premium users who are members of the guild, and how many members
+# without premium the guild has for every premium member.
+MEMBER_SHARE = 0.5
+OTHER_MEMBERS = 1
+
+
+async def measure(stage: Callable[[], Awaitable[T]]) -> tuple[T, float, float]:
+    """Return the stage's result, its duration and its peak traced memory in MB."""
+    start = time.perf_counter()
+    result = await stage()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    await stage()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1_000_000
+
+
+def build_guild(users: PremiumUsers, *, latency: float, cached: bool) -> FakeGuild:
+    guild = FakeGuild(1, latency=latency, cached=cached)
+    guild.add_role(PREMIUM_ROLE_ID)
+    guild.add_role(EXCLUDED_ROLE_ID)
+    members = sorted(users.ids)[:: round(1 / MEMBER_SHARE)]
+    for member_id in members:
+        guild.add_member(member_id, PREMIUM_ROLE_ID)
+    for member_id in range(1, len(members) * OTHER_MEMBERS + 1):
+        guild.add_member(member_id)
+    return guild
+
+
+async def run(
+    user_count: int, change_rate: float, *, latency: float, cached: bool
+) -> dict[str, float]:
+    before = synthetic_users(user_count)
+    after = mutate(before, change_rate)
+    api = MockPremiumAPI(before)
+    await api.start()
+    client = PremiumClient(api.url)
+    await client.open()
+    row: dict[str, float] = {}
+    try:
+
+        async def fetch() -> PremiumUsers | None:
+            client.etag = client.last_modified = None
+            return await client.fetch(None)
+
+        snapshot, row["fetch"], row["fetch_mb"] = await measure(fetch)
+        assert snapshot is not None
+        start = time.perf_counter()
+        assert await client.fetch(None) is None
+        row["not_modified"] = time.perf_counter() - start
+
+        api.publish(after)
+        body = json.dumps(after).encode()
+
+        async def parse() -> PremiumUsers:
+            parser = PremiumStreamParser()
+            for offset in range(0, len(body), CHUNK_SIZE):
+                parser.feed(body[offset : offset + CHUNK_SIZE])
+            return parser.close()
+
+        async def legacy_parse() -> list[int]:
+            return [user["id"] for user in parse_premium_users(json.loads(body))]
+
+        users, row["parse"], row["parse_mb"] = await measure(parse)
+        _, row["legacy_parse"], row["legacy_parse_mb"] = await measure(legacy_parse)
+    finally:
+        await client.close()
+        await api.close()
+
+    guild = build_guild(snapshot, latency=latency, cached=cached)
+    premium_role: Any = guild.roles[PREMIUM_ROLE_ID]
+    excluded_role: Any = guild.roles[EXCLUDED_ROLE_ID]
+
+    async def diff() -> Any:
+        guild.requests = 0
+        # The gateway budget is not modelled, the queries column shows its cost.
+        return await PremiumSync(snapshot).plan(
+            users, premium_role, excluded_role, MemberResolver(rate=sys.maxsize)
+        )
+
+    changes, row["diff"], row["diff_mb"] = await measure(diff)
+    row["changes"] = len(changes.add) + len(changes.remove)
+    row["queries"] = guild.requests
+
+    guild.requests = 0
+    start = time.perf_counter()
+    report = await RoleExecutor().apply(
+        premium_role, changes.add, changes.remove, reason="benchmark"
+    )
+    row["apply"] = time.perf_counter() - start
+    assert not report.failed
+    return row
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--users", type=int, nargs="+", default=[1_000, 10_000, 100_000]
+    )
+    parser.add_argument(
+        "--change-rates", type=float, nargs="+", default=[0.001, 0.01, 0.1]
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.001,
+        help="Seconds each simulated Discord request takes.",
+    )
+    parser.add_argument(
+        "--uncached",
+        action="store_true",
+        help="Start with an empty member cache, as with restricted member caching.",
+    )
+    arguments = parser.parse_args()
+
+    print(
+        f"{'users':>8} {'change':>7} {'fetch':>12} {'304':>8} {'parse':>12} "
+        f"{'json.loads':>12} {'diff':>12} {'changes':>8} {'queries':>8} {'apply':>9}"
+    )
+    for user_count in arguments.users:
+        for change_rate in arguments.change_rates:
+            row = await run(
+                user_count,
+                change_rate,
+                latency=arguments.latency,
+                cached=not arguments.uncached,
+            )
+            print(
+                f"{user_count:>8,} {change_rate:>7.1%} "
+                f"{row['fetch'] * 1000:>5.0f}ms/{row['fetch_mb']:>4.1f}MB "
+                f"{row['not_modified'] * 1000:>6.1f}ms "
+                f"{row['parse'] * 1000:>5.0f}ms/{row['parse_mb']:>4.1f}MB "
+                f"{row['legacy_parse'] * 1000:>5.0f}ms/{row['legacy_parse_mb']:>4.1f}MB "
+                f"{row['diff'] * 1000:>5.1f}ms/{row['diff_mb']:>4.1f}MB "
+                f"{row['changes']:>8.0f} {row['queries']:>8.0f} "
+                f"{row['apply'] * 1000:>7.0f}ms"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
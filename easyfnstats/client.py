@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from contextlib import suppress
+
+import aiohttp
+
+from .premium import PremiumUsers, parse_premium_stream
+
+log = logging.getLogger("red.easysystem.easyfnstats.client")
+
+PREMIUM_URL = "https://api.easyfnstats.com/premium"
+MAX_ATTEMPTS = 4
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+TIMEOUT = aiohttp.ClientTimeout(total=30, connect=10, sock_read=20)
+CHUNK_SIZE = 64 * 1024
+# Responses worth retrying: rate limits and server-side failures.
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class PremiumClient:
+    """Fetch the premium user list over one long-lived, pooled session.
+
+    Requests are conditional on the validators of the last successful response,
+    so an unchanged list costs a bodiless 304 instead of a download and a parse.
+    Connection failures, timeouts, rate limits and server errors are retried with
+    jittered exponential backoff.
+    """
+
+    def __init__(self, url: str = PREMIUM_URL) -> None:
+        self.url = url
+        self.etag: str | None = None
+        self.last_modified: str | None = None
+        self._session: aiohttp.ClientSession | None = None
+
+    async def open(self) -> None:
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=4, ttl_dns_cache=300),
+            timeout=TIMEOUT,
+            raise_for_status=False,
+        )
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def fetch(self, api_key: str | None) -> PremiumUsers | None:
+        """Return the premium users, or ``None`` if they did not change."""
+        if self._session is None:
+            raise RuntimeError("The premium client is not open")
+
+        headers: dict[str, str] = {}
+        if api_key is not None:
+            headers["Authorization"] = api_key
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                async with self._session.get(
+                    self.url, params={"type": "user"}, headers=headers
+                ) as resp:
+                    if resp.status == 304:
+                        return None
+                    if resp.status not in RETRY_STATUSES or attempt == MAX_ATTEMPTS:
+                        resp.raise_for_status()
+                        users = await parse_premium_stream(
+                            resp.content.iter_chunked(CHUNK_SIZE)
+                        )
+                        self.etag = resp.headers.get("ETag")
+                        self.last_modified = resp.headers.get("Last-Modified")
+                        return users
+                    retry_after = resp.headers.get("Retry-After")
+                    log.warning(
+                        "Premium API answered %s, retrying (attempt %s of %s)",
+                        resp.status,
+                        attempt,
+                        MAX_ATTEMPTS,
+                    )
+            except (aiohttp.ClientConnectionError, TimeoutError):
+                if attempt == MAX_ATTEMPTS:
+                    raise
+                log.warning(
+                    "Premium API request failed, retrying (attempt %s of %s)",
+                    attempt,
+                    MAX_ATTEMPTS,
+                    exc_info=True,
+                )
+                retry_after = None
+            await self._backoff(attempt, retry_after)
+
+    @staticmethod
+    async def _backoff(attempt: int, retry_after: str | None) -> None:
+        delay = min(RETRY_BASE_DELAY * 2**attempt, RETRY_MAX_DELAY)
+        delay = random.uniform(delay / 2, delay)
+        if retry_after is not None:
+            with suppress(ValueError):
+                delay = max(delay, min(float(retry_after), RETRY_MAX_DELAY))
+        await asyncio.sleep(delay)
@@ -1,77 +1,513 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, cast
+import asyncio
+import logging
+import time
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING
 
 import aiohttp
+import discord
 from discord.ext import tasks
-from redbot.core import commands
+from redbot.core import Config, app_commands, commands
+from redbot.core.data_manager import cog_data_path
 
-from .types import PremiumUser
+from .client import PremiumClient
+from .members import MemberResolver
+from .premium import PremiumDelta, PremiumUsers
+from .push import PUSH_PATH, PushReceiver
+from .roles import RoleExecutor
+from .snapshot import PremiumSnapshot, load_snapshot, save_snapshot
+from .sync import PremiumSync, role_change
+from .types import EasyFnStatsGlobalSettings, EasyFnStatsGuildSettings
+from .views import ResponseView
 
 if TYPE_CHECKING:
     from redbot.core.bot import Red
 
+log = logging.getLogger("red.easysystem.easyfnstats")
 
-def parse_premium_users(value: object) -> list[PremiumUser]:
-    if not isinstance(value, list):
-        raise ValueError("Premium API response must be a list")
-
-    users: list[PremiumUser] = []
-    for entry in value:
-        if not isinstance(entry, dict):
-            raise ValueError("Each premium user must be an object")
-        user_id = entry.get("id")
-        source = entry.get("source")
-        if not isinstance(user_id, int) or isinstance(user_id, bool):
-            raise ValueError("Premium user id must be an integer")
-        if not isinstance(source, str):
-            raise ValueError("Premium user source must be a string")
-        users.append({"id": user_id, "source": source})
-    return users
+# The support server was the only, hard-coded premium server before mappings were
+# configurable, and is set up once on upgrade.
+SUPPORT_GUILD_ID = 341939185051107330
+SUPPORT_PREMIUM_ROLE_ID = 341940409309593606
+SUPPORT_TRANSLATOR_ROLE_ID = 498924054607298560
+SYNC_REASON = "EasyFortniteStats premium sync"
+POLL_INTERVAL = 300
+# While deltas are pushed, polling only reconciles and backs off up to this interval.
+MAX_POLL_INTERVAL = 3600
+# Consecutive failed syncs after which a server no longer gets retried on its own,
+# only when the premium list changes.
+GUILD_ERROR_BUDGET = 3
 
 
 class EasyFnStats(commands.Cog):
     def __init__(self, bot: Red) -> None:
         self.bot: Red = bot
+        self.settings = Config.get_conf(
+            self, identifier=461_803_925, force_registration=True
+        )
+        default_global: EasyFnStatsGlobalSettings = {
+            "schema_version": 0,
+            "push_host": "127.0.0.1",
+            "push_port": None,
+        }
+        self.settings.register_global(**default_global)
+        default_guild: EasyFnStatsGuildSettings = {
+            "premium_role_id": None,
+            "excluded_role_id": None,
+        }
+        self.settings.register_guild(**default_guild)
+        self._client = PremiumClient()
+        # The latest premium users, used to update members as soon as they change.
+        self._premium: PremiumUsers | None = None
+        # Premium and excluded role IDs of every server that mirrors premium users.
+        self._guild_roles: dict[int, tuple[int, int | None]] = {}
+        self._syncs: dict[int, PremiumSync] = {}
+        self._executors: dict[int, RoleExecutor] = {}
+        self._members = MemberResolver()
+        # Held while a server's role changes are applied, so two syncs never interleave.
+        self._sync_locks: dict[int, asyncio.Lock] = {}
+        self._guild_failures: dict[int, int] = {}
+        self._snapshot_path = cog_data_path(self) / "premium.snapshot"
+        self._fetched_at = 0.0
+        self._saved_guild_ids: list[int] = []
+        self._snapshot_lock = asyncio.Lock()
+        self._receiver = PushReceiver(self._apply_delta, self._get_push_secret)
+        # Deltas received since the last poll, which stretch the poll interval.
+        self._pushes = 0
+        # Deltas received while a poll is in flight, which its response may predate.
+        self._polled_deltas: list[PremiumDelta] | None = None
+        self._push_syncs: set[asyncio.Task[None]] = set()
 
     async def cog_load(self) -> None:
+        if await self.settings.schema_version() < 1:
+            guild_settings = self.settings.guild_from_id(SUPPORT_GUILD_ID)
+            await guild_settings.premium_role_id.set(SUPPORT_PREMIUM_ROLE_ID)
+            await guild_settings.excluded_role_id.set(SUPPORT_TRANSLATOR_ROLE_ID)
+            await self.settings.schema_version.set(1)
+
+        all_guilds: dict[
+            int, EasyFnStatsGuildSettings
+        ] = await self.settings.all_guilds()
+        for guild_id, guild_settings in all_guilds.items():
+            if guild_settings["premium_role_id"] is not None:
+                self._guild_roles[guild_id] = (
+                    guild_settings["premium_role_id"],
+                    guild_settings["excluded_role_id"],
+                )
+        await self._load_snapshot()
+        await self._client.open()
         self._premium_role_loop.start()
 
-    @tasks.loop(minutes=5)
+        push_port = await self.settings.push_port()
+        if push_port is not None:
+            try:
+                await self._receiver.start(await self.settings.push_host(), push_port)
+            except OSError:
+                log.exception("Could not start the premium delta receiver")
+
+    @commands.hybrid_group(  # pyright: ignore[reportArgumentType]
+        name="premium-roles", description="Manage the premium roles of this server."
+    )
+    @commands.guild_only()
+    @commands.is_owner()
+    async def premium_roles(self, _: commands.Context) -> None:
+        pass
+
+    @premium_roles.command(  # pyright: ignore[reportArgumentType]
+        name="set", description="Give premium users a role in this server."
+    )
+    @app_commands.describe(
+        role="The role premium users should receive.",
+        excluded_role="Members with this role do not receive granted premium.",
+    )
+    @app_commands.rename(excluded_role="excluded-role")
+    async def premium_roles_set(
+        self,
+        ctx: commands.Context,
+        role: discord.Role,
+        excluded_role: discord.Role | None = None,
+    ) -> None:
+        """Mirror the premium users into a role of this server."""
+        assert ctx.guild is not None
+        if not ctx.guild.me.guild_permissions.manage_roles or not role.is_assignable():
+            await ctx.send(
+                view=ResponseView(
+                    "Role not assignable",
+                    "I need the Manage Roles permission and a role above "
+                    f"{role.mention} to manage it.",
+                ),
+                ephemeral=True,
+            )
+            return
+
+        guild_settings = self.settings.guild(ctx.guild)
+        await guild_settings.premium_role_id.set(role.id)
+        await guild_settings.excluded_role_id.set(
+            excluded_role.id if excluded_role else None
+        )
+        self._guild_roles[ctx.guild.id] = (
+            role.id,
+            excluded_role.id if excluded_role else None,
+        )
+        # A new role needs a full sync, which the next run does for a fresh planner.
+        self._syncs.pop(ctx.guild.id, None)
+        self._guild_failures.pop(ctx.guild.id, None)
+
+        text = f"> **Premium role:** {role.mention}"
+        if excluded_role:
+            text += f"\n> **Excluded role:** {excluded_role.mention}"
+        await ctx.send(
+            view=ResponseView(
+                "Premium role set",
+                "Premium users will receive the role with the next sync.\n" + text,
+            ),
+            ephemeral=True,
+        )
+
+    @premium_roles.command(  # pyright: ignore[reportArgumentType]
+        name="remove", description="Stop managing the premium role of this server."
+    )
+    async def premium_roles_remove(self, ctx: commands.Context) -> None:
+        """Stop mirroring premium users into this server. Existing roles are kept."""
+        assert ctx.guild is not None
+        await self.settings.guild(ctx.guild).clear()
+        self._guild_roles.pop(ctx.guild.id, None)
+        self._syncs.pop(ctx.guild.id, None)
+        self._executors.pop(ctx.guild.id, None)
+        self._guild_failures.pop(ctx.guild.id, None)
+
+        await ctx.send(
+            view=ResponseView(
+                "Premium role removed",
+                "Premium roles in this server will no longer be managed.",
+            ),
+            ephemeral=True,
+        )
+
+    @premium_roles.command(  # pyright: ignore[reportArgumentType]
+        name="list", description="List all servers with a premium role."
+    )
+    async def premium_roles_list(self, ctx: commands.Context) -> None:
+        """List the premium role mappings of every server."""
+        lines = []
+        for guild_id, (role_id, excluded_role_id) in self._guild_roles.items():
+            # Role mentions only render in their own server, so names are shown.
+            guild = self.bot.get_guild(guild_id)
+            role = guild and guild.get_role(role_id)
+            line = f"> **{guild or guild_id}:** {role or role_id}"
+            if excluded_role_id is not None:
+                excluded_role = guild and guild.get_role(excluded_role_id)
+                line += f", excluding {excluded_role or excluded_role_id}"
+            if self._guild_failures.get(guild_id):
+                line += f" ({self._guild_failures[guild_id]} failed syncs)"
+            lines.append(line)
+
+        await ctx.send(
+            view=ResponseView(
+                "Premium roles", "\n".join(lines) or "No premium roles are set up."
+            ),
+            ephemeral=True,
+        )
+
+    @commands.hybrid_group(  # pyright: ignore[reportArgumentType]
+        name="premium-push", description="Manage the premium delta receiver."
+    )
+    @commands.is_owner()
+    async def premium_push(self, _: commands.Context) -> None:
+        pass
+
+    @premium_push.command(  # pyright: ignore[reportArgumentType]
+        name="enable", description="Receive premium deltas from the backend."
+    )
+    @app_commands.describe(
+        port="The port to listen on.",
+        host="The address to listen on.",
+    )
+    async def premium_push_enable(
+        self,
+        ctx: commands.Context,
+        port: commands.Range[int, 1, 65535],
+        host: str = "127.0.0.1",
+    ) -> None:
+        """Start the receiver for signed premium deltas.
+
+        The shared secret is set with `[p]set api easyfnstats push_secret,<secret>`.
+        """
+        await self._receiver.close()
+        try:
+            await self._receiver.start(host, port)
+        except OSError as error:
+            await ctx.send(
+                view=ResponseView(
+                    "Receiver not started",
+                    f"I could not listen on {host}:{port}: {error}",
+                ),
+                ephemeral=True,
+            )
+            return
+        await self.settings.push_host.set(host)
+        await self.settings.push_port.set(port)
+
+        await ctx.send(
+            view=ResponseView(
+                "Receiver started",
+                f"Premium deltas are accepted at `http://{host}:{port}{PUSH_PATH}`.",
+            ),
+            ephemeral=True,
+        )
+
+    @premium_push.command(  # pyright: ignore[reportArgumentType]
+        name="disable", description="Stop receiving premium deltas."
+    )
+    async def premium_push_disable(self, ctx: commands.Context) -> None:
+        """Stop the receiver and rely on polling alone."""
+        await self._receiver.close()
+        await self.settings.push_port.set(None)
+        self._premium_role_loop.change_interval(seconds=POLL_INTERVAL)
+
+        await ctx.send(
+            view=ResponseView(
+                "Receiver stopped", "Premium users will only be polled again."
+            ),
+            ephemeral=True,
+        )
+
+    @tasks.loop(seconds=POLL_INTERVAL)
     async def _premium_role_loop(self) -> None:
+        self._adapt_poll_interval()
         api_keys = await self.bot.get_shared_api_tokens("easyfnstats")
+        self._polled_deltas = []
+        try:
+            fetched = await self._client.fetch(api_keys.get("premium_key"))
+        except (aiohttp.ClientError, TimeoutError, ValueError):
+            if self._premium is None:
+                raise
+            # Servers that are behind can still catch up with the last known list.
+            log.warning(
+                "Could not fetch premium users, using the list from %s",
+                datetime.fromtimestamp(self._fetched_at, UTC).isoformat(),
+                exc_info=True,
+            )
+            fetched = None
+        finally:
+            polled_deltas, self._polled_deltas = self._polled_deltas, None
+        if fetched is not None:
+            # Deltas that arrived during the request are applied again, since the
+            # response may have been generated before them.
+            for delta in polled_deltas:
+                fetched = fetched.apply(delta)
+            self._premium = fetched
+            self._fetched_at = time.time()
+        users = self._premium
+        if users is None:
+            return
+
+        # An unchanged list only needs to reach servers that are not up to date.
+        guild_ids = [
+            guild_id
+            for guild_id in self._guild_roles
+            if fetched is not None or self._needs_sync(guild_id)
+        ]
+        for guild_id in self._guild_roles.keys() - guild_ids:
+            if sync := self._syncs.get(guild_id):
+                sync.skip()
+        await self._sync_guilds(users, guild_ids, changed=fetched is not None)
 
-        url = "https://api.easyfnstats.com/premium"
-        params = {"type": "user"}
-        headers = {"Authorization": api_keys.get("premium_key")}
-        async with (
-            aiohttp.ClientSession() as session,
-            session.get(url, params=params, headers=headers) as resp,
-        ):
-            data = parse_premium_users(cast(object, await resp.json()))
-        premium_user_ids = [entry["id"] for entry in data]
-
-        guild = self.bot.get_guild(341939185051107330)
-        if not guild:
+    def _adapt_poll_interval(self) -> None:
+        """Poll less often while pushes keep arriving, and fall back when they stop."""
+        interval = self._premium_role_loop.seconds or POLL_INTERVAL
+        if self._pushes:
+            interval = min(interval * 2, MAX_POLL_INTERVAL)
+        else:
+            interval = POLL_INTERVAL
+        self._pushes = 0
+        if interval != self._premium_role_loop.seconds:
+            self._premium_role_loop.change_interval(seconds=interval)
+
+    async def _apply_delta(self, delta: PremiumDelta) -> bool:
+        if self._premium is None:
+            # Without the full list, the delta cannot be applied to anything.
+            return False
+        users = self._premium = self._premium.apply(delta)
+        self._pushes += 1
+        if self._polled_deltas is not None:
+            self._polled_deltas.append(delta)
+        log.debug(
+            "Received a premium delta with %s added and %s removed users",
+            len(delta.added),
+            len(delta.removed),
+        )
+        task = asyncio.create_task(
+            self._sync_guilds(users, list(self._guild_roles), changed=True)
+        )
+        self._push_syncs.add(task)
+        task.add_done_callback(self._push_syncs.discard)
+        return True
+
+    async def _get_push_secret(self) -> str | None:
+        api_keys = await self.bot.get_shared_api_tokens("easyfnstats")
+        return api_keys.get("push_secret")
+
+    async def _sync_guilds(
+        self, users: PremiumUsers, guild_ids: list[int], *, changed: bool
+    ) -> None:
+        outcomes = await asyncio.gather(
+            *(self._sync_guild(guild_id, users) for guild_id in guild_ids),
+            return_exceptions=True,
+        )
+        for guild_id, outcome in zip(guild_ids, outcomes, strict=True):
+            if outcome is True:
+                self._guild_failures.pop(guild_id, None)
+                continue
+            if isinstance(outcome, BaseException) and not isinstance(
+                outcome, Exception
+            ):
+                raise outcome
+
+            failures = self._guild_failures.get(guild_id, 0) + 1
+            self._guild_failures[guild_id] = failures
+            log.warning(
+                "Could not sync the premium role in guild %s (%s consecutive failures)",
+                guild_id,
+                failures,
+                exc_info=outcome if isinstance(outcome, Exception) else None,
+            )
+
+        synced_guild_ids = sorted(
+            guild_id
+            for guild_id in self._guild_roles
+            if guild_id in self._syncs and guild_id not in self._guild_failures
+        )
+        if changed or synced_guild_ids != self._saved_guild_ids:
+            await self._save_snapshot(users, synced_guild_ids)
+
+    async def _load_snapshot(self) -> None:
+        snapshot = await asyncio.to_thread(load_snapshot, self._snapshot_path)
+        if snapshot is None:
             return
-        premium_role = guild.get_role(341940409309593606)
-        translator_role = guild.get_role(498924054607298560)
-        if not premium_role or not translator_role:
+        self._premium = snapshot.users
+        self._fetched_at = snapshot.fetched_at
+        self._client.etag = snapshot.etag
+        self._client.last_modified = snapshot.last_modified
+        # Roles may have changed while the bot was offline, so every server still
+        # gets a full sync on the first run. The snapshot only serves member joins
+        # and the fallback for an unreachable API until then.
+        self._saved_guild_ids = snapshot.synced_guild_ids
+        log.info(
+            "Loaded %s premium users from the snapshot of %s",
+            len(snapshot.users.ids),
+            datetime.fromtimestamp(snapshot.fetched_at, UTC).isoformat(),
+        )
+
+    async def _save_snapshot(
+        self, users: PremiumUsers, synced_guild_ids: list[int]
+    ) -> None:
+        snapshot = PremiumSnapshot(
+            users,
+            self._client.etag,
+            self._client.last_modified,
+            self._fetched_at,
+            synced_guild_ids,
+        )
+        try:
+            async with self._snapshot_lock:
+                await asyncio.to_thread(save_snapshot, self._snapshot_path, snapshot)
+        except OSError:
+            log.exception("Could not save the premium snapshot")
             return
-        for user_id in premium_user_ids:
-            member = guild.get_member(user_id)
-            if not member:
-                continue
-            if premium_role not in member.roles:
-                user_data = [e for e in data if e["id"] == user_id][0]
-                # If user has translator role and source is grant, do not grant role
-                if translator_role in member.roles and user_data["source"] == "grant":
-                    continue
-                await member.add_roles(premium_role)
+        self._saved_guild_ids = synced_guild_ids
+
+    def _needs_sync(self, guild_id: int) -> bool:
+        failures = self._guild_failures.get(guild_id, 0)
+        if failures >= GUILD_ERROR_BUDGET:
+            return False
+        sync = self._syncs.get(guild_id)
+        return failures > 0 or sync is None or sync.full_sync_due
+
+    async def _sync_guild(self, guild_id: int, users: PremiumUsers) -> bool:
+        """Sync one server's premium role. Returns whether every change was applied."""
+        roles = self._get_premium_roles(guild_id)
+        if roles is None:
+            return False
+        premium_role, excluded_role = roles
+
+        sync = self._syncs.setdefault(guild_id, PremiumSync())
+        executor = self._executors.setdefault(guild_id, RoleExecutor())
+        async with self._sync_locks.setdefault(guild_id, asyncio.Lock()):
+            changes = await sync.plan(users, premium_role, excluded_role, self._members)
+            report = await executor.apply(
+                premium_role, changes.add, changes.remove, reason=SYNC_REASON
+            )
+            self._members.forget(
+                guild_id, [member.id for member in (*changes.add, *changes.remove)]
+            )
+            failed = [failure.member_id for failure in report.failed]
+            sync.commit(users, changes, failed)
+        return not failed
+
+    @commands.Cog.listener("on_member_join")
+    async def on_premium_member_join(self, member: discord.Member) -> None:
+        # The member may be remembered as absent from an earlier sync.
+        self._members.forget(member.guild.id, [member.id])
+        await self._update_premium_member(member)
+
+    @commands.Cog.listener("on_member_update")
+    async def on_premium_member_update(
+        self, before: discord.Member, after: discord.Member
+    ) -> None:
+        # Role changes can affect the exclusion or undo a premium role.
+        if before.guild.id in self._guild_roles and before.roles != after.roles:
+            self._members.forget(after.guild.id, [after.id])
+            await self._update_premium_member(after)
+
+    @commands.Cog.listener("on_raw_member_remove")
+    async def on_premium_member_remove(
+        self, payload: discord.RawMemberRemoveEvent
+    ) -> None:
+        self._members.forget(payload.guild_id, [payload.user.id])
+
+    async def _update_premium_member(self, member: discord.Member) -> None:
+        if self._premium is None:
+            return
+        roles = self._get_premium_roles(member.guild.id)
+        if roles is None:
+            return
+        premium_role, excluded_role = roles
+
+        change = role_change(member, self._premium, premium_role, excluded_role)
+        try:
+            if change is True:
+                await member.add_roles(premium_role, reason=SYNC_REASON)
+            elif change is False:
+                await member.remove_roles(premium_role, reason=SYNC_REASON)
+        except discord.HTTPException:
+            log.warning(
+                "Could not update the premium role of member %s in guild %s",
+                member.id,
+                member.guild.id,
+                exc_info=True,
+            )
 
-        for member in premium_role.members:
-            if member.id not in premium_user_ids:
-                await member.remove_roles(premium_role)
+    def _get_premium_roles(
+        self, guild_id: int
+    ) -> tuple[discord.Role, discord.Role | None] | None:
+        role_ids = self._guild_roles.get(guild_id)
+        guild = self.bot.get_guild(guild_id)
+        if role_ids is None or guild is None:
+            return None
+        premium_role_id, excluded_role_id = role_ids
+        premium_role = guild.get_role(premium_role_id)
+        if premium_role is None:
+            return None
+        if excluded_role_id is None:
+            return premium_role, None
+        excluded_role = guild.get_role(excluded_role_id)
+        if excluded_role is None:
+            # Without its excluded role, granted premium could be handed out wrongly.
+            return None
+        return premium_role, excluded_role
 
     @_premium_role_loop.before_loop
     async def before_premium_role_loop(self) -> None:
@@ -79,3 +515,7 @@ class EasyFnStats(commands.Cog):
 
     async def cog_unload(self) -> None:
         self._premium_role_loop.cancel()
+        for task in self._push_syncs:
+            task.cancel()
+        await self._receiver.close()
+        await self._client.close()
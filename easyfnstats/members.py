@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from collections.abc import Collection, Iterable
+
+import discord
+
+# Discord answers member requests by ID for at most 100 users at a time.
+QUERY_LIMIT = 100
+LRU_SIZE = 1_000
+# Remembered members are fetched again after this many seconds, in case a change
+# to them was missed.
+LRU_TTL = 600
+# Users that were not members are only queried again after this many seconds, or
+# once they join.
+ABSENT_TTL = 86_400
+# Member requests share the gateway's budget of 120 commands per minute with
+# heartbeats and presence updates, so only half of it is used.
+QUERY_RATE = 60
+QUERY_PERIOD = 60.0
+
+
+class MemberResolver:
+    """Resolve members by ID without relying on a complete member cache.
+
+    Members are looked up in the guild's cache first and then in a small LRU of
+    earlier results. Only the remaining IDs are requested from the gateway, in
+    batches of up to 100 and at most ``rate`` batches per minute. Guilds whose
+    member list is fully cached are never queried, since a miss there means the
+    user is not a member. Remembered members expire after ``ttl`` seconds, users
+    that were not members after a day, and both should be forgotten when they
+    join, leave or change.
+
+    Querying members by ID requires the privileged members intent.
+    """
+
+    def __init__(
+        self, size: int = LRU_SIZE, ttl: float = LRU_TTL, rate: int = QUERY_RATE
+    ) -> None:
+        self._size = size
+        self._ttl = ttl
+        self._rate = rate
+        self._members: OrderedDict[tuple[int, int], tuple[discord.Member, float]] = (
+            OrderedDict()
+        )
+        # IDs that were not members by guild, and when that set was started. The
+        # whole set expires at once, which keeps it cheap for large guilds.
+        self._absent: dict[int, tuple[float, set[int]]] = {}
+        self._queries: deque[float] = deque()
+
+    async def resolve(
+        self, guild: discord.Guild, user_ids: Iterable[int]
+    ) -> dict[int, discord.Member]:
+        members: dict[int, discord.Member] = {}
+        missing: list[int] = []
+        now = time.monotonic()
+        absent = self._absent_ids(guild.id, now)
+        for user_id in user_ids:
+            member = guild.get_member(user_id)
+            if member is None:
+                member = self._recall(guild.id, user_id, now)
+            if member is not None:
+                members[user_id] = member
+            elif user_id not in absent:
+                missing.append(user_id)
+
+        if missing and not guild.chunked:
+            for chunk in discord.utils.as_chunks(missing, QUERY_LIMIT):
+                await self._throttle()
+                found = await guild.query_members(user_ids=chunk, limit=QUERY_LIMIT)
+                for member in found:
+                    members[member.id] = member
+                    self._remember(member)
+                absent.update(chunk)
+                absent.difference_update(member.id for member in found)
+        return members
+
+    def forget(self, guild_id: int, user_ids: Collection[int]) -> None:
+        """Drop members who joined, changed or left, since their copy is stale."""
+        _, absent = self._absent.get(guild_id, (0.0, set[int]()))
+        for user_id in user_ids:
+            self._members.pop((guild_id, user_id), None)
+            absent.discard(user_id)
+
+    def _absent_ids(self, guild_id: int, now: float) -> set[int]:
+        started_at, absent = self._absent.get(guild_id, (now, set[int]()))
+        if now - started_at > ABSENT_TTL:
+            started_at, absent = now, set[int]()
+        self._absent[guild_id] = (started_at, absent)
+        return absent
+
+    async def _throttle(self) -> None:
+        while len(self._queries) >= self._rate:
+            wait = self._queries[0] + QUERY_PERIOD - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            else:
+                self._queries.popleft()
+        self._queries.append(time.monotonic())
+
+    def _recall(self, guild_id: int, user_id: int, now: float) -> discord.Member | None:
+        entry = self._members.get((guild_id, user_id))
+        if entry is None:
+            return None
+        member, remembered_at = entry
+        if now - remembered_at > self._ttl:
+            del self._members[guild_id, user_id]
+            return None
+        self._members.move_to_end((guild_id, user_id))
+        return member
+
+    def _remember(self, member: discord.Member) -> None:
+        self._members[member.guild.id, member.id] = (member, time.monotonic())
+        self._members.move_to_end((member.guild.id, member.id))
+        while len(self._members) > self._size:
+            self._members.popitem(last=False)
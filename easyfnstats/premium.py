@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from array import array
+from collections.abc import AsyncIterable
+from typing import NamedTuple
+
+from .types import PremiumUser
+
+TOKEN = re.compile(r"[^ \t\n\r]")
+SEPARATOR = re.compile(r"[ \t\n\r]*,[ \t\n\r]*(?=[^ \t\n\r])")
+_decoder = json.JSONDecoder()
+# IDs are buffered and stored as signed 64-bit integers, which covers every snowflake.
+MAX_USER_ID = 2**63 - 1
+
+
+def validate_user_id(user_id: object) -> int:
+    if not isinstance(user_id, int) or isinstance(user_id, bool):
+        raise ValueError("Premium user id must be an integer")
+    if not 0 <= user_id <= MAX_USER_ID:
+        raise ValueError("Premium user id is out of range")
+    return user_id
+
+
+def validate_premium_user(entry: object) -> tuple[int, str]:
+    if not isinstance(entry, dict):
+        raise ValueError("Each premium user must be an object")
+    user_id = validate_user_id(entry.get("id"))
+    source = entry.get("source")
+    if not isinstance(source, str):
+        raise ValueError("Premium user source must be a string")
+    return user_id, source
+
+
+def parse_premium_users(value: object) -> list[PremiumUser]:
+    if not isinstance(value, list):
+        raise ValueError("Premium API response must be a list")
+
+    users: list[PremiumUser] = []
+    for entry in value:
+        user_id, source = validate_premium_user(entry)
+        users.append({"id": user_id, "source": source})
+    return users
+
+
+class PremiumDelta(NamedTuple):
+    added: list[PremiumUser]
+    removed: list[int]
+
+
+def parse_premium_delta(value: object) -> PremiumDelta:
+    if not isinstance(value, dict):
+        raise ValueError("Premium delta must be an object")
+    added = parse_premium_users(value.get("added", []))
+    removed = value.get("removed", [])
+    if not isinstance(removed, list):
+        raise ValueError("Removed premium users must be a list")
+    return PremiumDelta(added, [validate_user_id(user_id) for user_id in removed])
+
+
+class PremiumUsers(NamedTuple):
+    """The premium user IDs, with a side table for the less common sources.
+
+    Most users share one source, so only users whose source differs from
+    ``default_source`` have an entry in ``sources``.
+    """
+
+    ids: set[int]
+    default_source: str
+    sources: dict[int, str]
+
+    def source(self, user_id: int) -> str | None:
+        if user_id not in self.ids:
+            return None
+        return self.sources.get(user_id, self.default_source)
+
+    def apply(self, delta: PremiumDelta) -> PremiumUsers:
+        """Return a copy with the delta applied. Removals are applied first."""
+        ids = set(self.ids)
+        sources = dict(self.sources)
+        for user_id in delta.removed:
+            ids.discard(user_id)
+            sources.pop(user_id, None)
+        for user in delta.added:
+            ids.add(user["id"])
+            if user["source"] == self.default_source:
+                sources.pop(user["id"], None)
+            else:
+                sources[user["id"]] = user["source"]
+        return self._replace(ids=ids, sources=sources)
+
+
+class PremiumUsersBuilder:
+    """Collect validated premium users into ``PremiumUsers``.
+
+    IDs are buffered per source in 64-bit arrays, so no per-user object is kept
+    around until the final set is built.
+    """
+
+    def __init__(self) -> None:
+        self._by_source: dict[str, array[int]] = {}
+
+    def add(self, user_id: int, source: str) -> None:
+        ids = self._by_source.get(source)
+        if ids is None:
+            ids = self._by_source[source] = array("q")
+        ids.append(user_id)
+
+    def build(self) -> PremiumUsers:
+        if not self._by_source:
+            return PremiumUsers(set(), "", {})
+        default_source = max(self._by_source, key=lambda key: len(self._by_source[key]))
+        ids: set[int] = set()
+        sources: dict[int, str] = {}
+        for source, source_ids in self._by_source.items():
+            ids.update(source_ids)
+            if source != default_source:
+                sources.update(dict.fromkeys(source_ids, source))
+        return PremiumUsers(ids, default_source, sources)
+
+
+class PremiumStreamParser:
+    """Parse and validate the premium API's JSON array while it is downloaded.
+
+    Each entry is decoded and validated as soon as it is complete, and only the
+    unparsed tail of the body is held in memory. Raises the same ``ValueError``s
+    as ``parse_premium_users``.
+    """
+
+    # Parser states: before the array, after "[", before an entry, after an entry
+    # and after "]".
+    START, OPENED, ENTRY, SEPARATOR, CLOSED = range(5)
+
+    def __init__(self) -> None:
+        self._builder = PremiumUsersBuilder()
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._state = self.START
+
+    def feed(self, chunk: bytes) -> None:
+        self._buffer += self._text_decoder.decode(chunk)
+        self._consume(final=False)
+
+    def close(self) -> PremiumUsers:
+        self._buffer += self._text_decoder.decode(b"", final=True)
+        self._consume(final=True)
+        if self._state != self.CLOSED:
+            raise json.JSONDecodeError(
+                "Expecting value", self._buffer, len(self._buffer)
+            )
+        return self._builder.build()
+
+    def _consume(self, *, final: bool) -> None:
+        buffer = self._buffer
+        pos = 0
+        while token := TOKEN.search(buffer, pos):
+            pos = token.start()
+            char = buffer[pos]
+            if self._state == self.START:
+                if char != "[":
+                    raise ValueError("Premium API response must be a list")
+                pos += 1
+                self._state = self.OPENED
+            elif char == "]" and self._state in (self.OPENED, self.SEPARATOR):
+                pos += 1
+                self._state = self.CLOSED
+            elif self._state in (self.OPENED, self.ENTRY):
+                pos, complete = self._decode_entries(buffer, pos, final=final)
+                if not complete:
+                    break
+            elif self._state == self.SEPARATOR and char == ",":
+                pos += 1
+                self._state = self.ENTRY
+            elif self._state == self.SEPARATOR:
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+            else:
+                raise json.JSONDecodeError("Extra data", buffer, pos)
+        else:
+            pos = len(buffer)
+        self._buffer = buffer[pos:]
+
+    def _decode_entries(
+        self, buffer: str, pos: int, *, final: bool
+    ) -> tuple[int, bool]:
+        # Entries are usually separated by a bare comma, so consecutive entries are
+        # decoded here without going through the state machine for each of them.
+        add = self._builder.add
+        self._state = self.ENTRY
+        while True:
+            try:
+                entry, pos = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                # The entry is not complete yet.
+                return pos, False
+            add(*validate_premium_user(entry))
+            separator = SEPARATOR.match(buffer, pos)
+            if separator is None:
+                self._state = self.SEPARATOR
+                return pos, True
+            pos = separator.end()
+
+
+async def parse_premium_stream(chunks: AsyncIterable[bytes]) -> PremiumUsers:
+    parser = PremiumStreamParser()
+    async for chunk in chunks:
+        parser.feed(chunk)
+    return parser.close()
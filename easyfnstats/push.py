@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import logging
+import math
+import time
+from collections.abc import Awaitable, Callable
+
+from aiohttp import web
+
+from .premium import PremiumDelta, parse_premium_delta
+
+log = logging.getLogger("red.easysystem.easyfnstats.push")
+
+PUSH_PATH = "/premium/delta"
+# Signed requests older or newer than this are rejected as replays.
+MAX_CLOCK_SKEW = 300
+MAX_BODY_SIZE = 1024 * 1024
+
+DeltaHandler = Callable[[PremiumDelta], Awaitable[bool]]
+
+
+def sign_delta(secret: str, timestamp: str, body: bytes) -> str:
+    """Return the signature the premium backend sends for a delta payload."""
+    message = timestamp.encode() + b"." + body
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+class PushReceiver:
+    """A small HTTP server that accepts signed premium deltas from the backend.
+
+    Each request carries an ``X-Timestamp`` header and an ``X-Signature`` header
+    holding the hex HMAC-SHA256 of ``"<timestamp>.<body>"`` with the shared
+    secret. Valid deltas are passed to the handler, which returns ``False`` if it
+    cannot apply them yet. Signatures are remembered until their timestamp falls
+    out of the accepted window, so a captured request cannot be replayed.
+    """
+
+    def __init__(
+        self,
+        handler: DeltaHandler,
+        get_secret: Callable[[], Awaitable[str | None]],
+    ) -> None:
+        self._handler = handler
+        self._get_secret = get_secret
+        self._runner: web.AppRunner | None = None
+        # Expiry times of the signatures of accepted requests.
+        self._seen: dict[str, float] = {}
+
+    async def start(self, host: str, port: int) -> None:
+        app = web.Application(client_max_size=MAX_BODY_SIZE)
+        app.router.add_post(PUSH_PATH, self._receive)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        log.info("Receiving premium deltas on %s:%s", host, port)
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _receive(self, request: web.Request) -> web.Response:
+        secret = await self._get_secret()
+        if not secret:
+            return web.Response(status=503, text="No push secret is configured")
+
+        body = await request.read()
+        timestamp = request.headers.get("X-Timestamp", "")
+        signature = request.headers.get("X-Signature", "")
+        now = time.time()
+        try:
+            sent_at = float(timestamp)
+        except ValueError:
+            sent_at = None
+        if (
+            sent_at is None
+            # NaN compares false with everything and would slip past the window.
+            or not math.isfinite(sent_at)
+            or abs(now - sent_at) > MAX_CLOCK_SKEW
+            or not hmac.compare_digest(signature, sign_delta(secret, timestamp, body))
+        ):
+            log.warning("Rejected a premium delta with an invalid signature")
+            return web.Response(status=401, text="Invalid signature")
+
+        self._seen = {
+            seen: expires_at
+            for seen, expires_at in self._seen.items()
+            if expires_at > now
+        }
+        if signature in self._seen:
+            log.warning("Rejected a replayed premium delta")
+            return web.Response(status=409, text="Delta was already received")
+
+        try:
+            delta = parse_premium_delta(json.loads(body))
+        except ValueError as error:
+            return web.Response(status=400, text=str(error))
+
+        # Remember the signature before applying, so a concurrent replay is refused,
+        # but forget it again if the backend has to retry.
+        self._seen[signature] = sent_at + MAX_CLOCK_SKEW
+        if not await self._handler(delta):
+            del self._seen[signature]
+            return web.Response(status=503, text="Premium users are not loaded yet")
+        return web.Response(status=204)
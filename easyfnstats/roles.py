@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Sequence
+from typing import NamedTuple
+
+import discord
+
+log = logging.getLogger("red.easysystem.easyfnstats.roles")
+
+# Role edits of one guild share a rate limit bucket, so a few requests in flight
+# keep it saturated without queueing hundreds of them inside discord.py.
+DEFAULT_CONCURRENCY = 4
+PROGRESS_EVERY = 100
+
+
+class RoleFailure(NamedTuple):
+    member_id: int
+    added: bool
+    error: discord.HTTPException
+
+
+class RoleReport(NamedTuple):
+    applied: int
+    failed: list[RoleFailure]
+
+
+class RoleExecutor:
+    """Add and remove one role for many members with bounded concurrency.
+
+    Rate limits are left to discord.py, which waits on the route's bucket and
+    retries on 429s. Each member's edit succeeds or fails on its own, and the
+    failures are reported together instead of aborting the remaining edits.
+    """
+
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY) -> None:
+        self._slots = asyncio.Semaphore(concurrency)
+
+    async def apply(
+        self,
+        role: discord.Role,
+        add: Sequence[discord.Member],
+        remove: Sequence[discord.Member],
+        *,
+        reason: str,
+    ) -> RoleReport:
+        total = len(add) + len(remove)
+        done = 0
+
+        async def edit(member: discord.Member, added: bool) -> RoleFailure | None:
+            nonlocal done
+            async with self._slots:
+                try:
+                    if added:
+                        await member.add_roles(role, reason=reason)
+                    else:
+                        await member.remove_roles(role, reason=reason)
+                except discord.HTTPException as error:
+                    log.warning(
+                        "Could not %s the %s role of member %s in guild %s",
+                        "add" if added else "remove",
+                        role.name,
+                        member.id,
+                        role.guild.id,
+                        exc_info=error,
+                    )
+                    return RoleFailure(member.id, added, error)
+                finally:
+                    done += 1
+                    if done % PROGRESS_EVERY == 0 and done < total:
+                        log.info(
+                            "Processed %s of %s %s role changes in guild %s",
+                            done,
+                            total,
+                            role.name,
+                            role.guild.id,
+                        )
+            return None
+
+        outcomes = await asyncio.gather(
+            *(edit(member, True) for member in add),
+            *(edit(member, False) for member in remove),
+        )
+        failed = [outcome for outcome in outcomes if outcome is not None]
+        if total:
+            log.info(
+                "Applied %s of %s %s role changes in guild %s",
+                total - len(failed),
+                total,
+                role.name,
+                role.guild.id,
+            )
+        return RoleReport(total - len(failed), failed)
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import struct
+from array import array
+from pathlib import Path
+from typing import NamedTuple
+
+from .premium import PremiumUsers
+
+log = logging.getLogger("red.easysystem.easyfnstats.snapshot")
+
+MAGIC = b"EFPS"
+VERSION = 1
+# Magic, format version and the length of the JSON metadata that follows.
+HEADER = struct.Struct("<4sBI")
+
+
+class PremiumSnapshot(NamedTuple):
+    users: PremiumUsers
+    etag: str | None
+    last_modified: str | None
+    fetched_at: float
+    # Servers whose premium role matched ``users`` when the snapshot was saved.
+    synced_guild_ids: list[int]
+
+
+def save_snapshot(path: Path, snapshot: PremiumSnapshot) -> None:
+    """Write the snapshot atomically in a compact, columnar format.
+
+    The file holds a small JSON header followed by the premium IDs as one array
+    of 64-bit integers, and the source side table as an ID array and an array of
+    indices into the header's source names.
+    """
+    users = snapshot.users
+    source_names = sorted(set(users.sources.values()))
+    source_indices = {source: index for index, source in enumerate(source_names)}
+    metadata = json.dumps(
+        {
+            "etag": snapshot.etag,
+            "last_modified": snapshot.last_modified,
+            "fetched_at": snapshot.fetched_at,
+            "synced_guild_ids": snapshot.synced_guild_ids,
+            "default_source": users.default_source,
+            "source_names": source_names,
+            "id_count": len(users.ids),
+            "source_count": len(users.sources),
+        }
+    ).encode()
+
+    temporary = path.with_suffix(".tmp")
+    with temporary.open("wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(metadata)))
+        file.write(metadata)
+        array("q", users.ids).tofile(file)
+        array("q", users.sources.keys()).tofile(file)
+        array(
+            "H", (source_indices[source] for source in users.sources.values())
+        ).tofile(file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+def load_snapshot(path: Path) -> PremiumSnapshot | None:
+    """Read a snapshot written by ``save_snapshot``, or ``None`` if there is none."""
+    try:
+        with path.open("rb") as file:
+            magic, version, metadata_size = HEADER.unpack(file.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                log.warning("Ignoring premium snapshot with an unknown format")
+                return None
+            metadata = json.loads(file.read(metadata_size))
+            ids = array("q")
+            ids.fromfile(file, metadata["id_count"])
+            source_ids = array("q")
+            source_ids.fromfile(file, metadata["source_count"])
+            source_indices = array("H")
+            source_indices.fromfile(file, metadata["source_count"])
+        names: list[str] = metadata["source_names"]
+        sources = dict(
+            zip(source_ids, (names[index] for index in source_indices), strict=True)
+        )
+        return PremiumSnapshot(
+            PremiumUsers(set(ids), metadata["default_source"], sources),
+            metadata["etag"],
+            metadata["last_modified"],
+            metadata["fetched_at"],
+            metadata["synced_guild_ids"],
+        )
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, ValueError, LookupError, struct.error):
+        log.warning("Ignoring unreadable premium snapshot", exc_info=True)
+        return None
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    import discord
+
+    from .members import MemberResolver
+    from .premium import PremiumUsers
+
+# Every this many polls, all premium users and role holders are checked again, which
+# repairs roles that were changed by hand in the meantime.
+FULL_SYNC_EVERY = 12
+
+
+class RoleChanges(NamedTuple):
+    add: list[discord.Member]
+    remove: list[discord.Member]
+    full: bool
+
+
+def role_change(
+    member: discord.Member,
+    users: PremiumUsers,
+    premium_role: discord.Role,
+    excluded_role: discord.Role | None,
+) -> bool | None:
+    """Return ``True`` to add the member's premium role, ``False`` to remove it, or
+    ``None`` if it is already right."""
+    has_role = member.get_role(premium_role.id) is not None
+    source = users.source(member.id)
+    if source is None:
+        return False if has_role else None
+    if has_role:
+        return None
+    # Members with the excluded role, such as translators, do not get granted premium.
+    if (
+        source == "grant"
+        and excluded_role is not None
+        and member.get_role(excluded_role.id)
+    ):
+        return None
+    return True
+
+
+class PremiumSync:
+    """Plan premium role changes from the difference between two API snapshots.
+
+    Only users that were added, removed or changed their source since the last
+    committed snapshot are looked at, and only members whose role state is
+    actually wrong are returned.
+    """
+
+    def __init__(self, snapshot: PremiumUsers | None = None) -> None:
+        self.snapshot = snapshot
+        # Runs since the last full sync, counting polls that needed no sync at all.
+        self._runs = 0
+
+    @property
+    def full_sync_due(self) -> bool:
+        return self.snapshot is None or self._runs >= FULL_SYNC_EVERY
+
+    def skip(self) -> None:
+        """Count a poll that did not sync this server towards the next full sync."""
+        self._runs += 1
+
+    async def plan(
+        self,
+        users: PremiumUsers,
+        premium_role: discord.Role,
+        excluded_role: discord.Role | None,
+        resolver: MemberResolver,
+    ) -> RoleChanges:
+        previous = self.snapshot
+        full = self.full_sync_due
+        # Role holders come from the member cache. With restricted caching, a role
+        # holder who lost premium while the bot was offline is only found once
+        # they join, leave or change, which the member listeners handle.
+        if previous is None or full:
+            candidates = users.ids | {member.id for member in premium_role.members}
+        else:
+            candidates = users.ids ^ previous.ids
+            if users.default_source == previous.default_source:
+                candidates.update(
+                    user_id
+                    for user_id in users.sources.keys() | previous.sources.keys()
+                    if users.source(user_id) != previous.source(user_id)
+                )
+            else:
+                candidates.update(users.ids)
+
+        changes = RoleChanges([], [], full)
+        members = await resolver.resolve(premium_role.guild, candidates)
+        for member in members.values():
+            change = role_change(member, users, premium_role, excluded_role)
+            if change is True:
+                changes.add.append(member)
+            elif change is False:
+                changes.remove.append(member)
+        return changes
+
+    def commit(
+        self, users: PremiumUsers, changes: RoleChanges, failed: Iterable[int] = ()
+    ) -> None:
+        """Remember the snapshot once its role changes were applied.
+
+        Members whose role change failed are recorded with the opposite premium
+        state, so the next run sees them as changed and plans them again.
+        """
+        self.snapshot = users._replace(ids=users.ids.symmetric_difference(failed))
+        self._runs = 0 if changes.full else self._runs + 1
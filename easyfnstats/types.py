@@ -1,6 +1,21 @@
+from __future__ import annotations
+
 from typing import TypedDict
 
 
 class PremiumUser(TypedDict):
     id: int
     source: str
+
+
+class EasyFnStatsGlobalSettings(TypedDict):
+    schema_version: int
+    push_host: str
+    # None while the premium delta receiver is disabled.
+    push_port: int | None
+
+
+class EasyFnStatsGuildSettings(TypedDict):
+    premium_role_id: int | None
+    # Members with this role do not receive premium that was granted to them.
+    excluded_role_id: int | None
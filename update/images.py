@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import logging
+from collections import OrderedDict
+from importlib.util import find_spec
+
+from .media import SpooledImage
+
+log = logging.getLogger("red.easysystem.update.images")
+
+# Pillow is optional. Without it, images are uploaded as they were given.
+PILLOW_AVAILABLE = find_spec("PIL") is not None
+JPEG_QUALITY = 85
+CACHE_SIZE = 32 * 1024 * 1024
+
+
+def optimize_image(data: bytes, max_size: int) -> bytes | None:
+    """Downscale an image to ``max_size`` pixels on its long side and recompress it.
+
+    PNGs are optimized losslessly, JPEGs are re-encoded at a capped quality and
+    static GIFs are re-encoded with an optimized palette. Returns ``None`` if the
+    result would not be smaller, or if the image is animated or unreadable.
+    """
+    from PIL import Image, ImageOps
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if getattr(image, "is_animated", False) or image.format not in (
+                "PNG",
+                "JPEG",
+                "GIF",
+            ):
+                return None
+            image_format = image.format
+            icc_profile = image.info.get("icc_profile")
+            # EXIF data is not kept, so apply its orientation to the pixels.
+            ImageOps.exif_transpose(image, in_place=True)
+            image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+            output = io.BytesIO()
+            if image_format == "JPEG":
+                image.save(
+                    output,
+                    "JPEG",
+                    quality=JPEG_QUALITY,
+                    optimize=True,
+                    progressive=True,
+                    icc_profile=icc_profile,
+                )
+            else:
+                image.save(output, image_format, optimize=True, icc_profile=icc_profile)
+    except (OSError, Image.DecompressionBombError):
+        log.debug("Could not optimize an update image", exc_info=True)
+        return None
+    optimized = output.getvalue()
+    return optimized if len(optimized) < len(data) else None
+
+
+class ImageOptimizer:
+    """Optimize update images in a worker thread and remember the results.
+
+    Results are cached by a hash of the original content and the size limit, up
+    to a total of ``size`` bytes, so posting the same image again is free.
+    """
+
+    def __init__(self, size: int = CACHE_SIZE) -> None:
+        self._size = size
+        self._used = 0
+        # ``None`` marks images that are already as small as they can get.
+        self._results: OrderedDict[tuple[bytes, int], bytes | None] = OrderedDict()
+
+    async def optimize(self, image: SpooledImage, max_size: int) -> SpooledImage:
+        """Return an optimized copy of the image, or the image itself."""
+        key = (image.digest, max_size)
+        if key in self._results:
+            self._results.move_to_end(key)
+            optimized = self._results[key]
+        else:
+            data = await asyncio.to_thread(image.read)
+            optimized = await asyncio.to_thread(optimize_image, data, max_size)
+            self._remember(key, optimized)
+            if optimized is not None:
+                log.debug(
+                    "Optimized %s from %d to %d bytes",
+                    image.filename,
+                    len(data),
+                    len(optimized),
+                )
+        if optimized is None:
+            return image
+
+        image.close()
+        return SpooledImage.from_bytes(image.filename, optimized)
+
+    def _remember(self, key: tuple[bytes, int], optimized: bytes | None) -> None:
+        self._results[key] = optimized
+        self._used += len(optimized or b"")
+        while self._used > self._size and len(self._results) > 1:
+            _, evicted = self._results.popitem(last=False)
+            self._used -= len(evicted or b"")
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import io
+import os
+import tempfile
+from contextlib import suppress
+
+import aiohttp
+import discord
+
+# Images up to this size stay in memory, larger ones are spooled to disk.
+SPOOL_SIZE = 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(total=60, sock_connect=10)
+
+
+class SpooledImage:
+    """An image attachment held in memory when small and in a temporary file otherwise.
+
+    Every ``to_file`` call opens an independent reader, so the same image can be
+    uploaded to several channels at once without being copied. ``digest`` is the
+    SHA-256 of the content, computed while it is downloaded.
+    """
+
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        self.digest = b""
+        self._data = b""
+        self._path: str | None = None
+
+    @classmethod
+    def from_bytes(cls, filename: str, data: bytes) -> SpooledImage:
+        image = cls(filename)
+        image.digest = hashlib.sha256(data).digest()
+        image._data = data
+        return image
+
+    @classmethod
+    async def download(
+        cls, session: aiohttp.ClientSession, attachment: discord.Attachment
+    ) -> SpooledImage:
+        image = cls(attachment.filename)
+        digest = hashlib.sha256()
+        try:
+            async with session.get(attachment.url, raise_for_status=True) as response:
+                buffer = bytearray()
+                spool = None
+                try:
+                    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                        digest.update(chunk)
+                        buffer += chunk
+                        if len(buffer) <= SPOOL_SIZE:
+                            continue
+                        # Disk writes happen in a worker thread, a buffer at a time.
+                        if spool is None:
+                            spool = await asyncio.to_thread(
+                                tempfile.NamedTemporaryFile,
+                                prefix="update-",
+                                delete=False,
+                            )
+                            image._path = spool.name
+                        data, buffer = buffer, bytearray()
+                        await asyncio.to_thread(spool.write, data)
+                    if spool is None:
+                        image._data = bytes(buffer)
+                    elif buffer:
+                        await asyncio.to_thread(spool.write, buffer)
+                finally:
+                    if spool is not None:
+                        spool.close()
+        except BaseException:
+            image.close()
+            raise
+        image.digest = digest.digest()
+        return image
+
+    def read(self) -> bytes:
+        """Return the content, reading it from disk if it was spooled there."""
+        if self._path is not None:
+            with open(self._path, "rb") as file:
+                return file.read()
+        return self._data
+
+    def to_file(self) -> discord.File:
+        if self._path is not None:
+            return discord.File(self._path, self.filename)
+        return discord.File(io.BytesIO(self._data), self.filename)
+
+    def close(self) -> None:
+        if self._path is not None:
+            with suppress(FileNotFoundError):
+                os.remove(self._path)
+            self._path = None
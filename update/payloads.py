@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from collections import OrderedDict
+from typing import cast
+
+import discord
+from discord.components import _component_factory  # pyright: ignore[reportPrivateUsage]
+
+CACHE_SIZE = 64
+
+
+def compile_payload(payload: str) -> tuple[discord.Component, ...]:
+    """Parse and validate a raw message payload into its components."""
+    raw_data = cast(object, json.loads(payload))
+    if not isinstance(raw_data, dict):
+        raise ValueError("Payload must be a JSON object")
+
+    data = raw_data.get("data")
+    if not isinstance(data, dict):
+        raise ValueError("Payload must contain a data object")
+
+    raw_components = data.get("components")
+    if not isinstance(raw_components, list):
+        raise ValueError("Payload data must contain a components list")
+
+    components: list[discord.Component] = []
+    for raw_component in raw_components:
+        if not isinstance(raw_component, dict) or not isinstance(
+            raw_component.get("type"), int
+        ):
+            raise ValueError("Each component must be an object with an integer type")
+        component_data = cast(dict[str, object], raw_component)
+        if component := _component_factory(component_data):  # pyright: ignore[reportArgumentType]
+            components.append(component)
+    return tuple(components)
+
+
+class ComponentsMessage(discord.Message):
+    def __init__(self, components: tuple[discord.Component, ...]) -> None:
+        self.components = list(components)
+
+
+class PayloadCache:
+    """Keep the compiled components of recently used payloads.
+
+    Entries are keyed by a hash of the payload, so the raw JSON is not kept
+    around. Components are read-only, which lets every send or edit build its
+    own ``LayoutView`` from the same cached list.
+    """
+
+    def __init__(self, size: int = CACHE_SIZE) -> None:
+        self._size = size
+        self._components: OrderedDict[bytes, tuple[discord.Component, ...]] = (
+            OrderedDict()
+        )
+
+    def build_view(self, payload: str) -> discord.ui.LayoutView:
+        return discord.ui.LayoutView.from_message(
+            ComponentsMessage(self.compile(payload))
+        )
+
+    def compile(self, payload: str) -> tuple[discord.Component, ...]:
+        key = hashlib.blake2b(payload.encode(), digest_size=16).digest()
+        components = self._components.get(key)
+        if components is not None:
+            self._components.move_to_end(key)
+            return components
+
+        components = self._components[key] = compile_payload(payload)
+        while len(self._components) > self._size:
+            self._components.popitem(last=False)
+        return components
@@ -1,6 +1,18 @@
 from typing import TypedDict
 
 
-class UpdateGuildSettings(TypedDict):
+class UpdateChannelSettings(TypedDict):
     emoji_id: int | None
     role_id: int | None
+
+
+class UpdateGuildSettings(TypedDict):
+    # Raw message payloads by template name.
+    templates: dict[str, str]
+    # Channel IDs by group name, for sending one update to several channels.
+    channel_groups: dict[str, list[int]]
+    # Longest side update images are scaled down to, or ``None`` to keep them.
+    max_image_size: int | None
+    # Channels of this guild that have update settings, or ``None`` until the
+    # index has been built from the channel settings.
+    channel_ids: list[int] | None
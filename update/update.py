@@ -1,42 +1,74 @@
 from __future__ import annotations
 
-import json
-from contextlib import suppress
+import asyncio
+import logging
+from collections.abc import Awaitable, Iterable
+from functools import partial
 from typing import TYPE_CHECKING, cast
 
+import aiohttp
 import discord
 from discord import app_commands
-from discord.components import _component_factory  # pyright: ignore[reportPrivateUsage]
 from redbot.core import Config, checks, commands
 
-from .types import UpdateGuildSettings
-from .views import ConfirmView, ResponseView, UpdateModal
+from .images import PILLOW_AVAILABLE, ImageOptimizer
+from .media import DOWNLOAD_TIMEOUT, SpooledImage
+from .payloads import PayloadCache
+from .types import UpdateChannelSettings, UpdateGuildSettings
+from .views import ChannelSettingsView, ConfirmView, ResponseView, UpdateModal
 
 if TYPE_CHECKING:
     from redbot.core.bot import Red
 
+log = logging.getLogger("red.easysystem.update")
+
+# Discord limits autocomplete choice names to 100 characters.
+NAME_LIMIT = 100
+# Channels an update is sent to at the same time, and the size of a group.
+SEND_CONCURRENCY = 4
+MAX_GROUP_SIZE = 25
+
 
 class Update(commands.Cog):
     def __init__(self, bot: Red):
         self.bot: Red = bot
         self.settings: Config = Config.get_conf(self, 200912392)
-        default_channel_settings: UpdateGuildSettings = {
+        default_channel_settings: UpdateChannelSettings = {
             "emoji_id": None,
             "role_id": None,
         }
         self.settings.register_channel(**default_channel_settings)
+        default_guild_settings: UpdateGuildSettings = {
+            "templates": {},
+            "channel_groups": {},
+            "max_image_size": None,
+            "channel_ids": None,
+        }
+        self.settings.register_guild(**default_guild_settings)
+        self.payloads = PayloadCache()
+        self._session: aiohttp.ClientSession | None = None
+        self._images = ImageOptimizer()
+
+    async def cog_load(self) -> None:
+        self._session = aiohttp.ClientSession(timeout=DOWNLOAD_TIMEOUT)
+
+    async def cog_unload(self) -> None:
+        if self._session is not None:
+            await self._session.close()
 
     @commands.hybrid_command(  # pyright: ignore[reportArgumentType]
         name="update",
-        description="Sends a update message to the selected channel with the selected parameters",
+        description="Sends a update message to the selected channels with the selected parameters",
     )
     @commands.guild_only()
     @checks.admin_or_permissions(manage_guild=True)
     @app_commands.default_permissions(manage_guild=True)
     @app_commands.describe(
         channel="The channel where the update message should be sent to.",
+        group="A channel group the update message should be sent to.",
         mention_type="The type of mention that should be used.",
         payload="The raw payload that should be used for the update message.",
+        template="A saved template that should be used for the update message.",
         image="The image that should be used for the update message.",
     )
     @app_commands.rename(mention_type="mention-type")
@@ -50,54 +82,105 @@ class Update(commands.Cog):
     async def _update(
         self,
         ctx: commands.Context,
-        channel: discord.TextChannel,
         mention_type: app_commands.Choice[int],
+        channel: discord.TextChannel | None = None,
+        group: str | None = None,
         payload: str | None = None,
+        template: str | None = None,
         image: discord.Attachment | None = None,
     ) -> None:
         assert ctx.guild is not None
         if ctx.interaction is None:
             return
 
-        if (
-            mention_type.value == 1
-            and not await self.settings.channel(channel).role_id()
-        ):
+        if payload and template:
             await ctx.send(
                 view=ResponseView(
-                    "No mention role setup",
-                    "You selected to mention a role but no role is set for the channel.",
+                    "Conflicting options",
+                    "You can not provide a payload and a template at the same time.",
                 ),
                 ephemeral=True,
             )
             return
 
-        if image and image.content_type not in ("image/png", "image/jpeg", "image/gif"):
+        if template:
+            payload = (await self.settings.guild(ctx.guild).templates()).get(template)
+            if payload is None:
+                await ctx.send(
+                    view=ResponseView(
+                        "Unknown template", f"There is no template named `{template}`."
+                    ),
+                    ephemeral=True,
+                )
+                return
+
+        channels = [channel] if channel else []
+        if group:
+            channel_ids = (await self.settings.guild(ctx.guild).channel_groups()).get(
+                group
+            )
+            if channel_ids is None:
+                await ctx.send(
+                    view=ResponseView(
+                        "Unknown group", f"There is no channel group named `{group}`."
+                    ),
+                    ephemeral=True,
+                )
+                return
+            for channel_id in channel_ids:
+                group_channel = ctx.guild.get_channel(channel_id)
+                if (
+                    isinstance(group_channel, discord.TextChannel)
+                    and group_channel not in channels
+                ):
+                    channels.append(group_channel)
+        if not channels:
             await ctx.send(
                 view=ResponseView(
-                    "Invalid image", "The image must be a PNG, JPEG, or GIF."
+                    "No channel selected",
+                    "You must select a channel or a channel group to send the update to.",
                 ),
                 ephemeral=True,
             )
             return
 
-        image_file = await image.to_file() if image else None
-
-        mention = None
+        channel_settings = {
+            target.id: cast(
+                UpdateChannelSettings, await self.settings.channel(target).all()
+            )
+            for target in channels
+        }
+        mentions: dict[int, str | None] = dict.fromkeys(channel_settings)
         if mention_type.value == 1:
-            role = ctx.guild.get_role(await self.settings.channel(channel).role_id())
-            if not role:
+            missing: list[str] = []
+            for target in channels:
+                role_id = channel_settings[target.id]["role_id"]
+                role = ctx.guild.get_role(role_id) if role_id else None
+                if role is None:
+                    missing.append(target.mention)
+                else:
+                    mentions[target.id] = role.mention
+            if missing:
                 await ctx.send(
                     view=ResponseView(
                         "Invalid mention role",
-                        "The mention role set for the channel does not exist.",
+                        "You selected to mention a role but no valid role is set for "
+                        f"these channels: {', '.join(missing)}",
                     ),
                     ephemeral=True,
                 )
                 return
-            mention = role.mention
         elif mention_type.value == 2:
-            mention = "@everyone"
+            mentions = dict.fromkeys(channel_settings, "@everyone")
+
+        if image and image.content_type not in ("image/png", "image/jpeg", "image/gif"):
+            await ctx.send(
+                view=ResponseView(
+                    "Invalid image", "The image must be a PNG, JPEG, or GIF."
+                ),
+                ephemeral=True,
+            )
+            return
 
         if not payload:
             modal = UpdateModal()
@@ -107,19 +190,39 @@ class Update(commands.Cog):
                 return
 
             ctx.interaction = modal.interaction
-
-            view = modal.build_view()
-            if image_file:
+            build_view = modal.build_view
+        else:
+            build_view = partial(self.build_view_from_payload, payload)
+
+        def compose(
+            mention: str | None, media: SpooledImage | str | None = None
+        ) -> tuple[discord.ui.LayoutView, list[discord.File]]:
+            view = build_view()
+            files: list[discord.File] = []
+            if isinstance(media, SpooledImage):
+                files.append(media.to_file())
                 view.add_item(
-                    discord.ui.MediaGallery(discord.MediaGalleryItem(image_file))
+                    discord.ui.MediaGallery(discord.MediaGalleryItem(files[0]))
                 )
-        else:
-            view = self.build_view_from_payload(payload)
-
-        if mention:
-            view.add_item(discord.ui.TextDisplay(content=f"-# {mention}"))
-
-        confirm_view = ConfirmView(view.children)
+            elif media:
+                view.add_item(discord.ui.MediaGallery(discord.MediaGalleryItem(media)))
+            if mention:
+                view.add_item(discord.ui.TextDisplay(content=f"-# {mention}"))
+            return view, files
+
+        # The preview links the attachment Discord already hosts for the
+        # command, so the image is only downloaded once the update is confirmed.
+        preview, _ = compose(
+            mentions[channels[0].id] if len(channels) == 1 else None,
+            image.url if image and not payload else None,
+        )
+        if len(channels) > 1:
+            preview.add_item(
+                discord.ui.TextDisplay(
+                    f"-# Sending to {', '.join(target.mention for target in channels)}"
+                )
+            )
+        confirm_view = ConfirmView(preview.children)
         await ctx.send(
             view=confirm_view, allowed_mentions=discord.AllowedMentions.none()
         )
@@ -133,25 +236,146 @@ class Update(commands.Cog):
             )
             return
         ctx.interaction = confirm_view.interaction
-
-        message = await channel.send(
-            view=view, allowed_mentions=discord.AllowedMentions.all()
-        )
-        emoji_id = await self.settings.channel(channel).emoji_id()
-        if emoji_id and ctx.bot.get_emoji(emoji_id):
-            with suppress(discord.Forbidden):
-                await message.add_reaction(ctx.bot.get_emoji(emoji_id))
-        if channel.is_news():
-            with suppress(discord.Forbidden):
-                await message.publish()
-
         await ctx.interaction.response.edit_message(
             view=ResponseView(
-                "Update sent",
-                "The update message was successfully sent.",
+                "Sending update",
+                f"The update message is being sent to {len(channels)} channel(s).",
             ),
         )
 
+        upload = None
+        if image and not payload:
+            try:
+                upload = await self._download(ctx.guild, image)
+            except (TimeoutError, aiohttp.ClientError):
+                await ctx.interaction.edit_original_response(
+                    view=ResponseView(
+                        "Image unavailable",
+                        "The image could not be downloaded and the update message was not sent.",
+                    ),
+                )
+                return
+        semaphore = asyncio.Semaphore(SEND_CONCURRENCY)
+        try:
+            results = await asyncio.gather(
+                *(
+                    self._deliver(
+                        target,
+                        *compose(mentions[target.id], upload),
+                        channel_settings[target.id]["emoji_id"],
+                        semaphore,
+                    )
+                    for target in channels
+                ),
+                return_exceptions=True,
+            )
+        finally:
+            if upload:
+                upload.close()
+
+        lines: list[str] = []
+        failed = 0
+        for target, result in zip(channels, results, strict=True):
+            if isinstance(result, BaseException):
+                log.warning(
+                    "Could not send an update to channel %s",
+                    target.id,
+                    exc_info=result,
+                )
+                result = (False, f"> {target.mention}: Failed to send")
+            sent, line = result
+            failed += not sent
+            lines.append(line)
+        if not failed:
+            title = "Update sent"
+        elif failed < len(results):
+            title = "Update partially sent"
+        else:
+            title = "Update not sent"
+        await ctx.interaction.edit_original_response(
+            view=ResponseView(title, "\n".join(lines)),
+        )
+
+    async def _deliver(
+        self,
+        channel: discord.TextChannel,
+        view: discord.ui.LayoutView,
+        files: list[discord.File],
+        emoji_id: int | None,
+        semaphore: asyncio.Semaphore,
+    ) -> tuple[bool, str]:
+        """Send one copy of an update, then react and crosspost it concurrently.
+
+        Returns whether the message was sent and a report line for the channel.
+        """
+        try:
+            async with semaphore:
+                message = await channel.send(
+                    view=view,
+                    files=files,
+                    allowed_mentions=discord.AllowedMentions.all(),
+                )
+        except discord.HTTPException as error:
+            return False, f"> {channel.mention}: Failed to send ({error.status})"
+
+        # The follow-up steps run outside the semaphore, so the next channel's
+        # send does not wait for them.
+        steps: dict[str, Awaitable[None]] = {}
+        emoji = self.bot.get_emoji(emoji_id) if emoji_id else None
+        if emoji:
+            steps["react"] = message.add_reaction(emoji)
+        if channel.is_news():
+            steps["publish"] = message.publish()
+        problems: list[str] = []
+        for step, result in zip(
+            steps,
+            await asyncio.gather(*steps.values(), return_exceptions=True),
+            strict=True,
+        ):
+            if isinstance(result, discord.Forbidden):
+                continue
+            if isinstance(result, Exception):
+                if not isinstance(result, discord.HTTPException):
+                    log.warning(
+                        "Could not %s an update in channel %s",
+                        step,
+                        channel.id,
+                        exc_info=result,
+                    )
+                problems.append(f"could not {step}")
+            elif isinstance(result, BaseException):
+                raise result
+        status = f"Sent, but {' and '.join(problems)}" if problems else "Sent"
+        return True, f"> {channel.mention}: [{status}]({message.jump_url})"
+
+    @_update.autocomplete("template")
+    async def _update_template_autocomplete(
+        self, interaction: discord.Interaction, current: str
+    ) -> list[app_commands.Choice[str]]:
+        if interaction.guild is None:
+            return []
+        names = await self.settings.guild(interaction.guild).templates()
+        return self._name_choices(names, current)
+
+    @_update.autocomplete("group")
+    async def _update_group_autocomplete(
+        self, interaction: discord.Interaction, current: str
+    ) -> list[app_commands.Choice[str]]:
+        if interaction.guild is None:
+            return []
+        names = await self.settings.guild(interaction.guild).channel_groups()
+        return self._name_choices(names, current)
+
+    @staticmethod
+    def _name_choices(
+        names: Iterable[str], current: str
+    ) -> list[app_commands.Choice[str]]:
+        return [
+            app_commands.Choice(name=name, value=name)
+            for name in sorted(names)
+            if current.lower() in name.lower()
+        ][:25]
+
     @commands.hybrid_command(  # pyright: ignore[reportArgumentType]
         name="update-edit", description="Edits a update message."
     )
@@ -172,6 +396,7 @@ class Update(commands.Cog):
         clear_image: bool = False,
         image: discord.Attachment | None = None,
     ) -> None:
+        assert ctx.guild is not None
         if ctx.interaction is None:
             return
         if not message.components:
@@ -203,17 +428,16 @@ class Update(commands.Cog):
             )
             return
 
-        image_file = await image.to_file() if image else None
-
         components = message.components
-        if self.check_basic_message(components):
+        basic = self.check_basic_message(components)
+        if basic:
             assert isinstance(components[0], discord.TextDisplay)
             message_component = components[0]
             title = message_component.content.split("\n")[0].removeprefix("# ").strip()
             text = "\n".join(message_component.content.split("\n")[1:]).strip()
-            old_image_file = (
+            old_media = (
                 components[1].items[0].media
-                if len(components) > 2
+                if len(components) >= 2
                 and isinstance(components[1], discord.MediaGalleryComponent)
                 else None
             )
@@ -227,14 +451,27 @@ class Update(commands.Cog):
             ctx.interaction = modal.interaction
 
             view = modal.build_view()
-            if image_file:
-                view.add_item(
-                    discord.ui.MediaGallery(discord.MediaGalleryItem(image_file))
+            if old_media and not image and not clear_image:
+                # Refer to the attachment the message already has instead of
+                # downloading and uploading it again.
+                attachment = next(
+                    (
+                        attachment
+                        for attachment in message.attachments
+                        if attachment.id == old_media.attachment_id
+                        or attachment.url.partition("?")[0]
+                        == old_media.url.partition("?")[0]
+                    ),
+                    None,
                 )
-            elif old_image_file and not clear_image:
-                image_file = await old_image_file.to_file()
                 view.add_item(
-                    discord.ui.MediaGallery(discord.MediaGalleryItem(image_file))
+                    discord.ui.MediaGallery(
+                        discord.MediaGalleryItem(
+                            f"attachment://{attachment.filename}"
+                            if attachment
+                            else old_media.url
+                        )
+                    )
                 )
         elif payload:
             view = self.build_view_from_payload(payload)
@@ -248,12 +485,33 @@ class Update(commands.Cog):
             )
             return
 
-        attachments = message.attachments
-        if image_file:
+        attachments: list[discord.Attachment | discord.File] = list(message.attachments)
+        upload = None
+        if image:
+            await ctx.defer()
+            try:
+                upload = await self._download(ctx.guild, image)
+            except (TimeoutError, aiohttp.ClientError):
+                await ctx.send(
+                    view=ResponseView(
+                        "Image unavailable",
+                        "The image could not be downloaded and the update message was not edited.",
+                    ),
+                )
+                return
+            image_file = upload.to_file()
             attachments = [image_file]
+            if basic:
+                view.add_item(
+                    discord.ui.MediaGallery(discord.MediaGalleryItem(image_file))
+                )
         elif clear_image:
             attachments = []
-        await message.edit(view=view, attachments=attachments)
+        try:
+            await message.edit(view=view, attachments=attachments)
+        finally:
+            if upload:
+                upload.close()
 
         await ctx.send(
             view=ResponseView(
@@ -277,6 +535,7 @@ class Update(commands.Cog):
         self, ctx: commands.Context, channel: discord.TextChannel, role: discord.Role
     ) -> None:
         await self.settings.channel(channel).role_id.set(role.id)
+        await self._index_channel(channel, configured=True)
 
         await ctx.send(
             view=ResponseView(
@@ -305,6 +564,7 @@ class Update(commands.Cog):
             )
             return
         await self.settings.channel(channel).emoji_id.set(emoji.id)
+        await self._index_channel(channel, configured=True)
         await ctx.send(
             view=ResponseView(
                 "Emoji set",
@@ -314,6 +574,35 @@ class Update(commands.Cog):
             ),
         )
 
+    @_update_settings.command(
+        name="image-size", description="Set the size update images are scaled to."
+    )
+    @app_commands.describe(
+        max_size="The longest side of an image in pixels, or 0 to upload images unchanged.",
+    )
+    @app_commands.rename(max_size="max-size")
+    async def _update_settings_image_size(
+        self, ctx: commands.Context, max_size: commands.Range[int, 0, 4096]
+    ) -> None:
+        assert ctx.guild is not None
+        if max_size and not PILLOW_AVAILABLE:
+            await ctx.send(
+                view=ResponseView(
+                    "Pillow not installed",
+                    "Images can only be optimized when Pillow is installed.",
+                ),
+            )
+            return
+        await self.settings.guild(ctx.guild).max_image_size.set(max_size or None)
+        await ctx.send(
+            view=ResponseView(
+                "Image size set",
+                f"Update images will be scaled to at most {max_size}px and recompressed."
+                if max_size
+                else "Update images will be uploaded unchanged.",
+            ),
+        )
+
     @_update_settings.command(
         name="clear", description="Clears the settings for a update channel."
     )
@@ -321,6 +610,7 @@ class Update(commands.Cog):
         self, ctx: commands.Context, channel: discord.TextChannel
     ) -> None:
         await self.settings.channel(channel).clear()
+        await self._index_channel(channel, configured=False)
         await ctx.send(
             view=ResponseView(
                 "Settings cleared",
@@ -334,60 +624,240 @@ class Update(commands.Cog):
     )
     async def _update_settings_list(self, ctx: commands.Context) -> None:
         assert ctx.guild is not None
-        view = discord.ui.LayoutView().add_item(
-            discord.ui.TextDisplay("# Update Channels")
-        )
-        for channel_id, data in (await self.settings.all_channels()).items():
+        entries: list[str] = []
+        for channel_id in await self._channel_ids(ctx.guild):
             channel = ctx.guild.get_channel(channel_id)
             if not channel:
                 continue
-            role = ctx.guild.get_role(data["role_id"])
-            view.add_item(
-                discord.ui.TextDisplay(
-                    f"### {channel.mention}\n"
-                    f"> **Emoji:** {ctx.bot.get_emoji(data['emoji_id'])}\n"
-                    f"> **Role:** {role.mention if role else 'None'}",
-                )
+            data = cast(
+                UpdateChannelSettings,
+                await self.settings.channel_from_id(channel_id).all(),
             )
-            # Only add separator if this is not the last channel in the list
-            if channel_id != list((await self.settings.all_channels()).keys())[-1]:
-                view.add_item(discord.ui.Separator())
-        if len(view.children) == 1:
-            view.add_item(
-                discord.ui.TextDisplay("There are no update channels set up.")
+            role = ctx.guild.get_role(data["role_id"]) if data["role_id"] else None
+            emoji = ctx.bot.get_emoji(data["emoji_id"]) if data["emoji_id"] else None
+            entries.append(
+                f"### {channel.mention}\n"
+                f"> **Emoji:** {emoji}\n"
+                f"> **Role:** {role.mention if role else 'None'}"
             )
-        await ctx.send(view=view)
+        await ctx.send(view=ChannelSettingsView(entries, ctx.author.id))
+
+    async def _channel_ids(self, guild: discord.Guild) -> list[int]:
+        """Return the IDs of the guild's channels that have update settings."""
+        channel_ids = await self.settings.guild(guild).channel_ids()
+        if channel_ids is None:
+            # Servers set up before the index existed are indexed once from the
+            # settings of every channel.
+            channel_ids = [
+                channel_id
+                for channel_id in await self.settings.all_channels()
+                if guild.get_channel(channel_id)
+            ]
+            await self.settings.guild(guild).channel_ids.set(channel_ids)
+        return channel_ids
+
+    async def _index_channel(
+        self, channel: discord.TextChannel, *, configured: bool
+    ) -> None:
+        channel_ids = await self._channel_ids(channel.guild)
+        if configured and channel.id not in channel_ids:
+            channel_ids.append(channel.id)
+        elif not configured and channel.id in channel_ids:
+            channel_ids.remove(channel.id)
+        else:
+            return
+        await self.settings.guild(channel.guild).channel_ids.set(channel_ids)
 
-    def build_view_from_payload(self, payload: str) -> discord.ui.LayoutView:
-        raw_data = cast(object, json.loads(payload))
-        if not isinstance(raw_data, dict):
-            raise ValueError("Payload must be a JSON object")
-
-        data = raw_data.get("data")
-        if not isinstance(data, dict):
-            raise ValueError("Payload must contain a data object")
-
-        raw_components = data.get("components")
-        if not isinstance(raw_components, list):
-            raise ValueError("Payload data must contain a components list")
-
-        components: list[discord.Component] = []
-        for raw_component in raw_components:
-            if not isinstance(raw_component, dict) or not isinstance(
-                raw_component.get("type"), int
-            ):
-                raise ValueError(
-                    "Each component must be an object with an integer type"
-                )
-            component_data = cast(dict[str, object], raw_component)
-            if component := _component_factory(component_data):  # pyright: ignore[reportArgumentType]
-                components.append(component)
+    @commands.hybrid_group(name="update-templates")  # pyright: ignore[reportArgumentType]
+    @commands.guild_only()
+    @checks.admin_or_permissions(manage_guild=True)
+    @app_commands.default_permissions(manage_guild=True)
+    async def _update_templates(self, _: commands.Context) -> None:
+        """Manage saved update payloads."""
+        pass
+
+    @_update_templates.command(
+        name="save", description="Save a payload as a named update template."
+    )
+    @app_commands.describe(
+        name="The name the template is referenced by.",
+        payload="The raw payload that should be saved.",
+    )
+    async def _update_templates_save(
+        self, ctx: commands.Context, name: str, *, payload: str
+    ) -> None:
+        assert ctx.guild is not None
+        name = name.strip()
+        if not name or len(name) > NAME_LIMIT:
+            await ctx.send(
+                view=ResponseView(
+                    "Invalid name",
+                    f"The template name must be 1 to {NAME_LIMIT} characters long.",
+                ),
+            )
+            return
+        try:
+            self.payloads.compile(payload)
+        except ValueError as error:
+            await ctx.send(view=ResponseView("Invalid payload", str(error)))
+            return
+
+        async with self.settings.guild(ctx.guild).templates() as templates:
+            templates[name] = payload
+        await ctx.send(
+            view=ResponseView(
+                "Template saved",
+                f"The template has been successfully saved.\n> **Name:** {name}",
+            ),
+        )
+
+    @_update_templates.command(
+        name="delete", description="Delete a saved update template."
+    )
+    async def _update_templates_delete(self, ctx: commands.Context, name: str) -> None:
+        assert ctx.guild is not None
+        async with self.settings.guild(ctx.guild).templates() as templates:
+            payload = templates.pop(name, None)
+        if payload is None:
+            await ctx.send(
+                view=ResponseView(
+                    "Unknown template", f"There is no template named `{name}`."
+                ),
+            )
+            return
+        await ctx.send(
+            view=ResponseView(
+                "Template deleted",
+                f"The template has been deleted.\n> **Name:** {name}",
+            ),
+        )
+
+    @_update_templates.command(name="list", description="List all saved templates.")
+    async def _update_templates_list(self, ctx: commands.Context) -> None:
+        assert ctx.guild is not None
+        names = sorted(await self.settings.guild(ctx.guild).templates())
+        await ctx.send(
+            view=ResponseView(
+                "Update Templates",
+                "\n".join(f"- {name}" for name in names)
+                or "There are no templates saved.",
+            ),
+        )
+
+    @commands.hybrid_group(name="update-groups")  # pyright: ignore[reportArgumentType]
+    @commands.guild_only()
+    @checks.admin_or_permissions(manage_guild=True)
+    @app_commands.default_permissions(manage_guild=True)
+    async def _update_groups(self, _: commands.Context) -> None:
+        """Manage groups of channels an update can be sent to at once."""
+        pass
+
+    @_update_groups.command(name="add", description="Add a channel to a channel group.")
+    @app_commands.describe(
+        name="The name of the group, which is created if it does not exist.",
+        channel="The channel that should be added to the group.",
+    )
+    async def _update_groups_add(
+        self, ctx: commands.Context, name: str, channel: discord.TextChannel
+    ) -> None:
+        assert ctx.guild is not None
+        name = name.strip()
+        if not name or len(name) > NAME_LIMIT:
+            await ctx.send(
+                view=ResponseView(
+                    "Invalid name",
+                    f"The group name must be 1 to {NAME_LIMIT} characters long.",
+                ),
+            )
+            return
+        async with self.settings.guild(ctx.guild).channel_groups() as groups:
+            channel_ids = groups.setdefault(name, [])
+            full = channel.id not in channel_ids and len(channel_ids) >= MAX_GROUP_SIZE
+            if not full and channel.id not in channel_ids:
+                channel_ids.append(channel.id)
+        if full:
+            await ctx.send(
+                view=ResponseView(
+                    "Group full",
+                    f"A channel group can not contain more than {MAX_GROUP_SIZE} channels.",
+                ),
+            )
+            return
+        await ctx.send(
+            view=ResponseView(
+                "Channel added",
+                "The channel has been added to the group.\n"
+                f"> **Group:** {name}\n"
+                f"> **Channel:** {channel.mention}",
+            ),
+        )
+
+    @_update_groups.command(
+        name="remove", description="Remove a channel from a channel group."
+    )
+    async def _update_groups_remove(
+        self, ctx: commands.Context, name: str, channel: discord.TextChannel
+    ) -> None:
+        assert ctx.guild is not None
+        async with self.settings.guild(ctx.guild).channel_groups() as groups:
+            channel_ids = groups.get(name, [])
+            removed = channel.id in channel_ids
+            if removed:
+                channel_ids.remove(channel.id)
+                if not channel_ids:
+                    del groups[name]
+        if not removed:
+            await ctx.send(
+                view=ResponseView(
+                    "Not in group",
+                    f"The channel is not part of a group named `{name}`.",
+                ),
+            )
+            return
+        await ctx.send(
+            view=ResponseView(
+                "Channel removed",
+                "The channel has been removed from the group.\n"
+                f"> **Group:** {name}\n"
+                f"> **Channel:** {channel.mention}",
+            ),
+        )
+
+    @_update_groups.command(name="list", description="List all channel groups.")
+    async def _update_groups_list(self, ctx: commands.Context) -> None:
+        assert ctx.guild is not None
+        groups = await self.settings.guild(ctx.guild).channel_groups()
+        lines: list[str] = []
+        for name, channel_ids in sorted(groups.items()):
+            mentions = [
+                channel.mention
+                for channel_id in channel_ids
+                if (channel := ctx.guild.get_channel(channel_id))
+            ]
+            lines.append(f"- **{name}:** {', '.join(mentions) or 'None'}")
+        await ctx.send(
+            view=ResponseView(
+                "Channel Groups",
+                "\n".join(lines) or "There are no channel groups set up.",
+            ),
+        )
 
-        class ComponentsMessage(discord.Message):
-            def __init__(self, components: list[discord.Component]) -> None:
-                self.components = components
+    async def _download(
+        self, guild: discord.Guild, image: discord.Attachment
+    ) -> SpooledImage:
+        assert self._session is not None
+        upload = await SpooledImage.download(self._session, image)
+        try:
+            max_size = await self.settings.guild(guild).max_image_size()
+            if max_size and PILLOW_AVAILABLE:
+                upload = await self._images.optimize(upload, max_size)
+        except BaseException:
+            upload.close()
+            raise
+        return upload
 
-        return discord.ui.LayoutView.from_message(ComponentsMessage(components))
+    def build_view_from_payload(self, payload: str) -> discord.ui.LayoutView:
+        return self.payloads.build_view(payload)
 
     def check_basic_message(self, components: list[discord.Component]) -> bool:
         """
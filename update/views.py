@@ -1,7 +1,12 @@
-from typing import Self
+from collections.abc import Sequence
+from typing import Any
 
 import discord.ui
 
+# Each channel takes a text display and a separator, which keeps a page well
+# below Discord's limit of 40 components per message.
+CHANNELS_PER_PAGE = 10
+
 
 class UpdateModal(discord.ui.Modal, title="Compose Update"):
     title_input = discord.ui.Label(text="Title", component=discord.ui.TextInput())
@@ -39,10 +44,65 @@ class ResponseView(discord.ui.LayoutView):
         self.add_item(discord.ui.TextDisplay(f"# {title}\n{text}"))
 
 
+class ChannelSettingsView(discord.ui.LayoutView):
+    """Page through the settings of a server's update channels."""
+
+    def __init__(self, entries: list[str], author_id: int) -> None:
+        super().__init__()
+        self.entries = entries
+        self.author_id = author_id
+        self.page = 0
+        self.pages = max(1, -(-len(entries) // CHANNELS_PER_PAGE))
+        self.render()
+
+    def render(self) -> None:
+        self.clear_items()
+        self.add_item(discord.ui.TextDisplay("# Update Channels"))
+        start = self.page * CHANNELS_PER_PAGE
+        for index, entry in enumerate(self.entries[start : start + CHANNELS_PER_PAGE]):
+            if index:
+                self.add_item(discord.ui.Separator())
+            self.add_item(discord.ui.TextDisplay(entry))
+        if not self.entries:
+            self.add_item(
+                discord.ui.TextDisplay("There are no update channels set up.")
+            )
+        if self.pages > 1:
+            self.add_item(
+                discord.ui.TextDisplay(
+                    f"-# Page {self.page + 1} of {self.pages}, "
+                    f"{len(self.entries)} channels"
+                )
+            ).add_item(
+                discord.ui.ActionRow(
+                    PageButton(self, -1, "Previous"), PageButton(self, 1, "Next")
+                )
+            )
+
+    async def interaction_check(self, interaction: discord.Interaction, /) -> bool:
+        return interaction.user.id == self.author_id
+
+
+class PageButton(discord.ui.Button[ChannelSettingsView]):
+    def __init__(self, view: ChannelSettingsView, step: int, label: str) -> None:
+        super().__init__(
+            style=discord.ButtonStyle.secondary,
+            label=label,
+            disabled=not 0 <= view.page + step < view.pages,
+        )
+        self.__view = view
+        self.__step = step
+
+    async def callback(self, interaction: discord.Interaction) -> None:
+        self.__view.page += self.__step
+        self.__view.render()
+        await interaction.response.edit_message(view=self.__view)
+
+
 class ConfirmView(discord.ui.LayoutView):
     interaction: discord.Interaction
 
-    def __init__(self, items: list[discord.ui.Item[Self]]) -> None:
+    def __init__(self, items: Sequence[discord.ui.Item[Any]]) -> None:
         super().__init__()
         for item in items:
             self.add_item(item)